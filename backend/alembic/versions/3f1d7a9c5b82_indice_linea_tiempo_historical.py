@@ -0,0 +1,65 @@
+"""indice compuesto para la linea de tiempo de historical
+
+Revision ID: 3f1d7a9c5b82
+Revises: e8a4c6b2d913
+Create Date: 2026-10-18 18:02:51.203776
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1d7a9c5b82'
+down_revision: Union[str, Sequence[str], None] = 'e8a4c6b2d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = 'ix_historical_entity_timeline'
+COLUMNS = ['entity', 'entity_id', 'created_at', 'id_historical']
+
+
+def _partitions() -> list[str]:
+    return list(op.get_bind().execute(sa.text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'historical'
+    """)).scalars())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(INDEX, 'historical', COLUMNS)
+        op.drop_index('ix_historical_entity', table_name='historical')
+        op.drop_index('ix_historical_entity_id', table_name='historical')
+        return
+
+    # Tabla particionada: CREATE INDEX CONCURRENTLY no se admite sobre el
+    # padre. Se crea el índice solo en el padre (inválido), cada partición
+    # lo construye sin bloquear escrituras y al adjuntarlas todas el del
+    # padre pasa a ser válido.
+    columns = ", ".join(COLUMNS)
+    op.execute(f"CREATE INDEX {INDEX} ON ONLY historical ({columns})")
+    partitions = _partitions()
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_entity_timeline ON {partition} ({columns})")
+    for partition in partitions:
+        op.execute(f"ALTER INDEX {INDEX} ATTACH PARTITION {partition}_entity_timeline")
+
+    # (entity) y (entity_id) por separado obligaban a un BitmapAnd; el
+    # compuesto cubre ambos usos
+    op.drop_index('ix_historical_entity', table_name='historical')
+    op.drop_index('ix_historical_entity_id', table_name='historical')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_historical_entity_id', 'historical', ['entity_id'], unique=False)
+    op.create_index('ix_historical_entity', 'historical', ['entity'], unique=False)
+    op.drop_index(INDEX, table_name='historical')
@@ -0,0 +1,44 @@
+"""indices para la visibilidad de operadores (created_by)
+
+Revision ID: 5d8e1b7f3a20
+Revises: c41f7d2e8b65
+Create Date: 2026-10-18 13:05:27.660412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8e1b7f3a20'
+down_revision: Union[str, Sequence[str], None] = 'c41f7d2e8b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        # Rama "creadas por mí" del UNION ALL del listado de operadores
+        op.create_index(
+            'ix_activity_active_creator_order', 'activity',
+            ['created_by', 'due_date', sa.text("priority DESC"), 'id_activity'],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            sqlite_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        # include_inactive y comprobación de la FK ON DELETE RESTRICT
+        op.create_index(
+            op.f('ix_activity_created_by'), 'activity', ['created_by'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_activity_created_by'), table_name='activity', postgresql_concurrently=True)
+        op.drop_index('ix_activity_active_creator_order', table_name='activity', postgresql_concurrently=True)
@@ -0,0 +1,32 @@
+"""version de actividades (control de concurrencia optimista)
+
+Revision ID: 7b3f9c2d1e44
+Revises: 5d8e1b7f3a20
+Create Date: 2026-10-18 15:42:10.381927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3f9c2d1e44'
+down_revision: Union[str, Sequence[str], None] = '5d8e1b7f3a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Con DEFAULT constante PostgreSQL no reescribe la tabla
+    op.add_column(
+        'activity',
+        sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('activity', 'version')
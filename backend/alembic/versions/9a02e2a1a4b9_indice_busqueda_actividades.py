@@ -0,0 +1,44 @@
+"""indice de busqueda de texto en actividades
+
+Revision ID: 9a02e2a1a4b9
+Revises: 32a622ba856d
+Create Date: 2026-10-18 09:12:41.532108
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a02e2a1a4b9'
+down_revision: Union[str, Sequence[str], None] = '32a622ba856d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Debe coincidir exactamente con la expresión de app/utils/search.py
+SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Solo PostgreSQL: en SQLite la búsqueda usa ILIKE
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_activity_search "
+            f"ON activity USING gin ({SEARCH_DOCUMENT})"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_activity_search")
@@ -0,0 +1,61 @@
+"""indices del listado sobre coalesce(due_date, fecha maxima)
+
+Revision ID: b6e2d94f1c37
+Revises: 3f1d7a9c5b82
+Create Date: 2026-10-18 21:14:36.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d94f1c37'
+down_revision: Union[str, Sequence[str], None] = '3f1d7a9c5b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Misma expresión que app.models.activity.due_date_key: el planificador solo
+# usa un índice de expresión si la consulta la repite tal cual
+DUE_DATE_KEY = sa.text("coalesce(due_date, '9999-12-31')")
+
+# (nombre, prefijo de igualdad, priority DESC en el orden)
+LISTING_INDEXES = [
+    ("ix_activity_active_order", [], True),
+    ("ix_activity_active_state_order", ["state"], True),
+    ("ix_activity_active_priority_order", ["priority"], False),
+    ("ix_activity_active_category_order", ["id_category"], True),
+    ("ix_activity_active_user_order", ["id_user"], True),
+    ("ix_activity_active_creator_order", ["created_by"], True),
+]
+
+
+def _columns(prefix: list, with_priority: bool, due_date) -> list:
+    return prefix + [due_date] + ([sa.text("priority DESC")] if with_priority else []) + ["id_activity"]
+
+
+def _rebuild(due_date) -> None:
+    # Uno a uno: durante la reconstrucción de cada índice los listados que
+    # lo usan ordenan en memoria, pero nunca faltan todos a la vez
+    with op.get_context().autocommit_block():
+        for name, prefix, with_priority in LISTING_INDEXES:
+            op.drop_index(name, table_name='activity', postgresql_concurrently=True)
+            op.create_index(
+                name, 'activity', _columns(prefix, with_priority, due_date), unique=False,
+                postgresql_where=sa.text("is_active"),
+                sqlite_where=sa.text("is_active"),
+                postgresql_concurrently=True,
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rebuild(DUE_DATE_KEY)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild("due_date")
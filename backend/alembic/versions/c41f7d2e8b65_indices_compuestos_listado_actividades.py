@@ -0,0 +1,56 @@
+"""indices compuestos y parciales del listado de actividades
+
+Revision ID: c41f7d2e8b65
+Revises: 9a02e2a1a4b9
+Create Date: 2026-10-18 11:40:03.918274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7d2e8b65'
+down_revision: Union[str, Sequence[str], None] = '9a02e2a1a4b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, columnas) — todos parciales sobre is_active y con el orden del
+# listado: due_date ASC (NULLS LAST en PG), priority DESC, id_activity ASC
+LISTING_INDEXES = [
+    ("ix_activity_active_order", ["due_date", sa.text("priority DESC"), "id_activity"]),
+    ("ix_activity_active_state_order", ["state", "due_date", sa.text("priority DESC"), "id_activity"]),
+    ("ix_activity_active_priority_order", ["priority", "due_date", "id_activity"]),
+    ("ix_activity_active_category_order", ["id_category", "due_date", sa.text("priority DESC"), "id_activity"]),
+    ("ix_activity_active_user_order", ["id_user", "due_date", sa.text("priority DESC"), "id_activity"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, columns in LISTING_INDEXES:
+            op.create_index(
+                name, 'activity', columns, unique=False,
+                postgresql_where=sa.text("is_active"),
+                sqlite_where=sa.text("is_active"),
+                postgresql_concurrently=True,
+            )
+
+        # Redundantes: is_active (booleano, sin selectividad) queda cubierto
+        # por los parciales; id_activity duplica la clave primaria
+        op.drop_index(op.f('ix_activity_is_active'), table_name='activity', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_activity_id_activity'), table_name='activity', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_activity_id_activity'), 'activity', ['id_activity'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_activity_is_active'), 'activity', ['is_active'], unique=False, postgresql_concurrently=True)
+
+        for name, _ in reversed(LISTING_INDEXES):
+            op.drop_index(name, table_name='activity', postgresql_concurrently=True)
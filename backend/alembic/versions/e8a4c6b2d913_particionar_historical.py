@@ -0,0 +1,134 @@
+"""particionar historical por mes (created_at)
+
+Revision ID: e8a4c6b2d913
+Revises: 7b3f9c2d1e44
+Create Date: 2026-10-18 17:20:44.918305
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a4c6b2d913'
+down_revision: Union[str, Sequence[str], None] = '7b3f9c2d1e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Particiones que se crean por delante del mes actual; después las
+# mantiene `python -m app.partitions`
+MONTHS_AHEAD = 3
+
+LEGACY_INDEXES = [
+    'ix_historical_created_at',
+    'ix_historical_entity',
+    'ix_historical_entity_id',
+    'ix_historical_id_historical',
+    'ix_historical_id_user',
+]
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month: date) -> None:
+    op.execute(
+        f"CREATE TABLE historical_y{month.year}m{month.month:02d} PARTITION OF historical "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Particionado declarativo: solo PostgreSQL
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # 1. Apartar la tabla actual liberando los nombres de índices y restricciones
+    for index in LEGACY_INDEXES:
+        op.drop_index(index, table_name='historical')
+    op.rename_table('historical', 'historical_legacy')
+    op.execute("ALTER TABLE historical_legacy RENAME CONSTRAINT historical_pkey TO historical_legacy_pkey")
+    op.execute("ALTER TABLE historical_legacy RENAME CONSTRAINT historical_id_user_fkey TO historical_legacy_id_user_fkey")
+    # La secuencia sobrevive a la tabla vieja y la hereda la nueva
+    op.execute("ALTER SEQUENCE historical_id_historical_seq OWNED BY NONE")
+
+    # 2. Tabla particionada: la clave de partición tiene que estar en la PK
+    op.execute("""
+        CREATE TABLE historical (
+            id_historical integer NOT NULL DEFAULT nextval('historical_id_historical_seq'),
+            entity varchar(50) NOT NULL,
+            entity_id integer NOT NULL,
+            action varchar(20) NOT NULL,
+            modified_field varchar(50),
+            previous_value text,
+            new_value text,
+            id_user integer NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT historical_pkey PRIMARY KEY (id_historical, created_at),
+            CONSTRAINT historical_id_user_fkey FOREIGN KEY (id_user)
+                REFERENCES users (id_user) ON DELETE RESTRICT
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE historical_id_historical_seq OWNED BY historical.id_historical")
+
+    # Índices particionados (se propagan a cada partición). id_historical ya
+    # está cubierto por la PK.
+    op.create_index('ix_historical_created_at', 'historical', ['created_at'])
+    op.create_index('ix_historical_entity', 'historical', ['entity'])
+    op.create_index('ix_historical_entity_id', 'historical', ['entity_id'])
+    op.create_index('ix_historical_id_user', 'historical', ['id_user'])
+
+    # 3. Particiones mensuales desde el registro más antiguo hasta MONTHS_AHEAD
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM historical_legacy")).scalar()
+    current = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+    # Red de seguridad: si el mantenimiento no se ejecuta, los inserts no fallan
+    op.execute("CREATE TABLE historical_default PARTITION OF historical DEFAULT")
+
+    # 4. Copiar y retirar la tabla vieja
+    op.execute("INSERT INTO historical SELECT * FROM historical_legacy")
+    op.drop_table('historical_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER SEQUENCE historical_id_historical_seq OWNED BY NONE")
+    op.rename_table('historical', 'historical_partitioned')
+    op.execute("ALTER TABLE historical_partitioned RENAME CONSTRAINT historical_pkey TO historical_partitioned_pkey")
+    op.execute("ALTER TABLE historical_partitioned RENAME CONSTRAINT historical_id_user_fkey TO historical_partitioned_id_user_fkey")
+    for index in ('ix_historical_created_at', 'ix_historical_entity', 'ix_historical_entity_id', 'ix_historical_id_user'):
+        op.drop_index(index, table_name='historical_partitioned')
+
+    op.create_table('historical',
+    sa.Column('id_historical', sa.Integer(), server_default=sa.text("nextval('historical_id_historical_seq')"), nullable=False),
+    sa.Column('entity', sa.String(length=50), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('modified_field', sa.String(length=50), nullable=True),
+    sa.Column('previous_value', sa.Text(), nullable=True),
+    sa.Column('new_value', sa.Text(), nullable=True),
+    sa.Column('id_user', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['id_user'], ['users.id_user'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('id_historical')
+    )
+    op.execute("ALTER SEQUENCE historical_id_historical_seq OWNED BY historical.id_historical")
+    op.execute("INSERT INTO historical SELECT * FROM historical_partitioned")
+    # Borra también todas las particiones
+    op.drop_table('historical_partitioned')
+
+    for index in LEGACY_INDEXES:
+        column = index.removeprefix('ix_historical_')
+        op.create_index(op.f(index), 'historical', [column], unique=False)
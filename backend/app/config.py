@@ -10,6 +10,65 @@ class Settings(BaseSettings):
     description_name: str = "API para gestión de actividades operativas"
     debug: bool = False
 
+    # Base de datos asíncrona (AsyncSession); por defecto se deriva de database_url
+    async_db: bool = False
+    async_database_url: str | None = None
+
+    # Réplica de lectura (opcional): la usan las rutas GET. Un usuario que
+    # acaba de escribir lee del primario durante read_your_writes_seconds
+    replica_database_url: str | None = None
+    async_replica_database_url: str | None = None
+    read_your_writes_seconds: float = 5.0
+
+    # Logging estructurado
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_slow_request_ms: int = 1000
+    # Fracción de peticiones correctas que se registran por plantilla de ruta
+    log_sample_rates: dict[str, float] = {"/health": 0.01, "/metrics": 0.01}
+    # Aviso de N+1: misma forma de sentencia más de N veces en una petición
+    sql_repeat_threshold: int = 10
+
+    # Hashing de contraseñas: pool propio y coste calibrado al arrancar
+    password_hash_workers: int = 2
+    password_hash_queue_size: int = 8
+    # Modo sync: fracción máxima del threadpool esperando un hash
+    password_hash_threadpool_share: float = 0.25
+    bcrypt_target_ms: int = 250
+    bcrypt_rounds: int | None = None  # fijo: desactiva la calibración
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+
+    # Caché del usuario autenticado (get_current_user)
+    user_cache_ttl_seconds: int = 60
+    user_cache_size: int = 10_000
+
+    # Totales estimados de los listados (total_mode=estimated)
+    count_cache_ttl_seconds: int = 30
+    count_cache_size: int = 1024
+
+    # Auditoría (tabla historical): cola en memoria + inserción por lotes
+    audit_batch_size: int = 200
+    audit_flush_interval_seconds: float = 1.0
+    audit_queue_size: int = 10_000
+
+    # Exportación de actividades: filas por lote del cursor de servidor
+    export_batch_size: int = 1000
+
+    # Importación CSV de actividades: filas por lote (COPY / executemany)
+    import_batch_size: int = 5000
+
+    # Catálogo de categorías en memoria (recarga en otros workers)
+    category_catalog_ttl_seconds: int = 60
+
+    # Estadísticas del dashboard: cada cuánto se recalculan los contadores
+    stats_reconcile_seconds: int = 300
+
+    # Particiones mensuales de historical (python -m app.partitions)
+    historical_partitions_ahead: int = 3
+    historical_retention_months: int = 12
+    historical_archive_dir: str = "archive/historical"
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
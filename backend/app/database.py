@@ -1,11 +1,22 @@
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 #Engine -> conexion con PostgreSQL
 engine = create_engine(
-    settings.database_url, 
+    settings.database_url,
     pool_pre_ping=True
 )
 
@@ -13,14 +24,272 @@ engine = create_engine(
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False, #los objetos devueltos se serializan tras el commit
     bind=engine #uso exclusivo de la base de datos
 )
 
 Base = declarative_base() #todas mis tablas van a heredar de esta clase
 
-def get_db():
+
+# ============================================
+# ESTADÍSTICAS SQL POR PETICIÓN
+# ============================================
+# Cada sentencia se atribuye a la petición en curso (query_stats_var, que
+# fija el middleware). Así se detectan N+1: las relaciones lazy
+# (Activity.assigned_user, Activity.creator, Category.activities) lanzan
+# la misma sentencia una y otra vez sin que se vea en el código.
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*\)")
+_POSTCOMPILE = re.compile(r"__\[POSTCOMPILE_\w+\]")
+
+
+def statement_fingerprint(statement: str) -> str:
+    """Forma de la sentencia: sin espacios redundantes ni listas IN de longitud variable"""
+    statement = _POSTCOMPILE.sub("?", statement)
+    statement = _IN_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+@dataclass(slots=True)
+class QueryStats:
+    count: int = 0
+    duration_ms: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.fingerprints[statement_fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Formas de sentencia ejecutadas más de `threshold` veces"""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n > threshold]
+
+
+# Objeto mutable compartido: run_in_threadpool copia el contexto, pero la
+# referencia es la misma, así que los hilos suman sobre la misma instancia
+query_stats_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def _handle_error(exception_context):
+    # La sentencia falló: after_cursor_execute no llegará
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def track_queries(sync_engine) -> None:
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+track_queries(engine)
+
+
+# ============================================
+# MODO ASÍNCRONO (settings.async_db)
+# ============================================
+# Con async_db=True las peticiones usan AsyncSession (asyncpg / aiosqlite)
+# y no ocupan hilos del threadpool mientras esperan a la base de datos.
+# El engine síncrono sigue existiendo para seeds, migraciones y scripts.
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str) -> str:
+    """URL async equivalente (mismo servidor, driver asíncrono)"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)).render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.async_db:
+    async_engine = create_async_engine(
+        settings.async_database_url or _async_url(settings.database_url),
+        pool_pre_ping=True
+    )
+    track_queries(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        autoflush=False,
+        expire_on_commit=False,
+        bind=async_engine
+    )
+
+
+# ============================================
+# RÉPLICA DE LECTURA
+# ============================================
+# Las rutas GET usan get_read_db: una ReadSession que resuelve el engine en
+# cada consulta (get_bind). Va a la réplica salvo que:
+#
+# - no haya réplica configurada (replica_database_url);
+# - el usuario de la petición haya escrito hace menos de
+#   read_your_writes_seconds (lee lo que acaba de escribir);
+# - la sesión pida el primario (use_primary) para una lectura que no
+#   tolera retraso.
+#
+# Las escrituras usan get_db (primario). Cualquier commit de una sesión del
+# primario marca al usuario de la petición (current_user_id_var, lo fija
+# get_current_user). La ventana es de cada proceso: con varios workers, una
+# lectura servida por otro worker puede ir a la réplica.
+
+replica_engine = None
+async_replica_engine = None
+
+if settings.replica_database_url:
+    replica_engine = create_engine(settings.replica_database_url, pool_pre_ping=True)
+    track_queries(replica_engine)
+    if settings.async_db:
+        async_replica_engine = create_async_engine(
+            settings.async_replica_database_url or _async_url(settings.replica_database_url),
+            pool_pre_ping=True
+        )
+        track_queries(async_replica_engine.sync_engine)
+
+current_user_id_var: ContextVar[int | None] = ContextVar("current_user_id", default=None)
+
+
+class RecentWriters:
+    """id_user → fin de su ventana read-your-writes (time.monotonic)"""
+
+    def __init__(self, window: float, max_entries: int = 10_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, id_user: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[id_user] = now + self.window
+            if len(self._until) > self.max_entries:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+
+    def __contains__(self, id_user: int | None) -> bool:
+        until = self._until.get(id_user)
+        return until is not None and until > time.monotonic()
+
+
+recent_writers = RecentWriters(settings.read_your_writes_seconds)
+
+
+class ReadSession(Session):
+    primary = engine
+    replica = replica_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replica is None
+            or self.info.get("primary")
+            or current_user_id_var.get() in recent_writers
+        ):
+            return self.primary
+        return self.replica
+
+
+@contextmanager
+def use_primary(db: Session):
+    """Lecturas de una ReadSession que no toleran el retraso de la réplica"""
+    previous = db.info.get("primary")
+    db.info["primary"] = True
+    try:
+        yield db
+    finally:
+        db.info["primary"] = previous
+
+
+def _mark_writer(session: Session) -> None:
+    if not isinstance(session, ReadSession):
+        id_user = current_user_id_var.get()
+        if id_user is not None:
+            recent_writers.mark(id_user)
+
+
+event.listen(Session, "after_commit", _mark_writer)
+
+ReadSessionLocal = sessionmaker(
+    class_=ReadSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+AsyncReadSessionLocal = None
+
+if settings.async_db:
+    class AsyncReadSession(ReadSession):
+        # AsyncSession delega en una Session síncrona: get_bind devuelve
+        # el engine síncrono de cada AsyncEngine
+        primary = async_engine.sync_engine
+        replica = async_replica_engine.sync_engine if async_replica_engine else None
+
+    AsyncReadSessionLocal = async_sessionmaker(
+        sync_session_class=AsyncReadSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+def _get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def _get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _get_sync_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def _get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+get_db = _get_async_db if settings.async_db else _get_sync_db
+get_read_db = _get_async_read_db if settings.async_db else _get_sync_read_db
+
+
+async def run_db(db: Session | AsyncSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Ejecuta un servicio síncrono `fn(session, *args)` sin bloquear el event loop.
+
+    Con AsyncSession se usa run_sync: el mismo código ORM corre con I/O
+    asíncrona. Con Session se delega al threadpool, como hacía FastAPI
+    con los endpoints `def`.
+
+    Uso:
+        return await run_db(db, activity_service.get_by_id, activity_id, current_user)
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
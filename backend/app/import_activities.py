@@ -0,0 +1,52 @@
+# app/import_activities.py
+# Importa actividades desde un CSV, con las mismas reglas que
+# POST /api/activities/import.
+#
+#   python -m app.import_activities actividades.csv --user admin@sistema.com
+#   python -m app.import_activities - --user admin@sistema.com < actividades.csv
+#
+# Cabecera: title, description, priority, due_date, category (nombre) o
+# id_category. Las actividades quedan creadas por --user y asignadas a él.
+# Sale con código 1 si alguna fila se rechazó.
+
+import argparse
+import sys
+
+from fastapi import HTTPException
+
+from app.database import SessionLocal
+from app.models import User
+from app.services.importer import import_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importación CSV de actividades")
+    parser.add_argument("path", help="fichero CSV ('-' para la entrada estándar)")
+    parser.add_argument("--user", required=True, help="email del usuario que crea las actividades")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == args.user, User.is_active == True).first()
+        if user is None:
+            sys.exit(f"No existe un usuario activo con email {args.user}")
+        db.expunge(user)
+
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    try:
+        result = import_csv(stream, user)
+    except HTTPException as e:
+        sys.exit(e.detail)
+    finally:
+        stream.close()
+
+    for error in result.errors:
+        print(f"línea {error.line}: {error.error}")
+    if result.failed > len(result.errors):
+        print(f"... y {result.failed - len(result.errors)} errores más")
+    print(f"creadas {result.created}, rechazadas {result.failed}")
+    if result.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
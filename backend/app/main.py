@@ -1,8 +1,39 @@
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import auth_router, users_router, categories_router, activities_router
+from app.database import engine, async_engine, replica_engine, async_replica_engine, Base
+from app.routers import auth_router, users_router, categories_router, activities_router, history_router
+from app.utils import principal_cache, calibrate_password_hashing, bound_password_hashing, shutdown_password_hashing
+from app.utils.logger import setup_logging, shutdown_logging
+from app.utils.metrics import registry, instrument_engine, watch_cache
+from app.utils.pagination import count_cache
+from app.middleware import RequestLoggingMiddleware, MetricsMiddleware
+from app.services.audit import start_audit_writer, stop_audit_writer
+from app.services.stats import start_stats_reconciler, stop_stats_reconciler
+from app.services.catalog import load_category_catalog
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arranque
+    setup_logging()
+    bound_password_hashing(anyio.to_thread.current_default_thread_limiter().total_tokens)
+    await run_in_threadpool(calibrate_password_hashing)
+    await run_in_threadpool(load_category_catalog)
+    start_audit_writer()
+    start_stats_reconciler()
+    yield
+    # Apagado
+    stop_stats_reconciler()
+    await run_in_threadpool(stop_audit_writer)
+    shutdown_password_hashing()
+    shutdown_logging()
+
 
 app = FastAPI(
     title = settings.app_name,
@@ -11,7 +42,8 @@ app = FastAPI(
     debug = settings.debug,
     docs_url = "/docs",
     redoc_url = "/redoc",
-    openapi_url = "/openapi.json"
+    openapi_url = "/openapi.json",
+    lifespan = lifespan
 )
 
 # CORS Configuration
@@ -32,10 +64,24 @@ app.add_middleware(
     max_age=3600,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
+
+instrument_engine(engine, "primary")
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine, "async")
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+if async_replica_engine is not None:
+    instrument_engine(async_replica_engine.sync_engine, "async_replica")
+watch_cache("principal", principal_cache)
+watch_cache("count", count_cache)
+
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
 app.include_router(categories_router, prefix="/api/categories", tags=["Categories"])
 app.include_router(activities_router, prefix="/api/activities", tags=["Activities"])
+app.include_router(history_router, prefix="/api/history", tags=["History"])
 
 
 @app.get("/")
@@ -44,4 +90,9 @@ def read_root():
 
 @app.get("/health")
 def read_root():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok", "user_cache": principal_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Formato de exposición de texto de Prometheus
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
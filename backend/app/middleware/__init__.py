@@ -0,0 +1,2 @@
+from app.middleware.request_logging import RequestLoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
@@ -0,0 +1,111 @@
+import logging
+import random
+import re
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.database import QueryStats, query_stats_var
+from app.utils.logger import request_id_var
+
+logger = logging.getLogger("app.access")
+sql_logger = logging.getLogger("app.sql")
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def route_template(scope: Scope) -> str:
+    """Plantilla de la ruta ("/api/activities/{activity_id}"), no la URL concreta"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestLoggingMiddleware:
+    """
+    Asigna un request id (X-Request-ID), mide la latencia y registra una
+    línea por petición con ruta, estado, duración y consultas SQL.
+    El tiempo en base de datos se devuelve también en Server-Timing.
+
+    Las rutas de mucho volumen se muestrean con settings.log_sample_rates;
+    los errores (>= 400) y las peticiones lentas se registran siempre.
+    Middleware ASGI puro: no envuelve el cuerpo de la respuesta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        stats = QueryStats()
+        stats_token = query_stats_var.set(stats)
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                server_timing = f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries"'
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode()),
+                    (b"server-timing", server_timing.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            logger.exception("error no controlado", extra={"fields": {
+                "method": scope["method"],
+                "route": route_template(scope),
+            }})
+            raise
+        finally:
+            self._log(scope, status_code, (time.perf_counter() - started) * 1000, stats)
+            self._warn_repeated(scope, stats)
+            query_stats_var.reset(stats_token)
+            request_id_var.reset(token)
+
+    def _warn_repeated(self, scope: Scope, stats: QueryStats) -> None:
+        for fingerprint, times in stats.repeated(settings.sql_repeat_threshold):
+            sql_logger.warning("posible N+1: sentencia repetida", extra={"fields": {
+                "method": scope["method"],
+                "route": route_template(scope),
+                "times": times,
+                "statement": fingerprint[:500],
+            }})
+
+    def _log(self, scope: Scope, status_code: int, duration_ms: float, stats: QueryStats) -> None:
+        route = route_template(scope)
+        slow = duration_ms >= settings.log_slow_request_ms
+
+        if status_code < 400 and not slow:
+            rate = settings.log_sample_rates.get(route, 1.0)
+            if rate < 1.0 and random.random() >= rate:
+                return
+
+        if status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400 or slow:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+
+        logger.log(level, "request", extra={"fields": {
+            "method": scope["method"],
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": stats.count,
+            "db_ms": round(stats.duration_ms, 2),
+        }})
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Date, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Date, ForeignKey, Enum, Index, text, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import date
 import enum
 
 from app.database import Base
@@ -28,9 +29,20 @@ class PriorityEnum(str, enum.Enum):
     urgente = "urgente"
 
 
+# Clave de orden del listado: due_date con los NULL como la fecha máxima.
+# Ordenar y buscar el cursor sobre esta expresión (y no sobre due_date
+# NULLS LAST) deja un límite inferior único, `clave >= fecha del cursor`,
+# que el índice usa como Index Cond; el mismo texto va en los índices.
+DUE_DATE_LAST = date.max
+
+
+def due_date_key(due_date):
+    return func.coalesce(due_date, literal_column(f"'{DUE_DATE_LAST.isoformat()}'", Date))
+
+
 class Activity(Base):
     __tablename__ = "activity"
-    id_activity = Column(Integer, primary_key=True, index=True)
+    id_activity = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     state = Column(
@@ -65,11 +77,16 @@ class Activity(Base):
     created_by = Column(
         Integer,
         ForeignKey("users.id_user", ondelete="RESTRICT"),
-        nullable=False
+        nullable=False,
+        index=True
     )
     
     # Soft delete
-    is_active = Column(Boolean, default=True, nullable=False, index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    # Concurrencia optimista: cada escritura hace version = version + 1 y
+    # PUT con If-Match solo escribe si la versión sigue siendo la esperada
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -94,5 +111,46 @@ class Activity(Base):
         back_populates="activities"
     )
     
+    # ============================================
+    # ÍNDICES DEL LISTADO
+    # ============================================
+    # Parciales sobre activas y con el mismo orden que el listado
+    # (due_date_key ASC, priority DESC, id_activity ASC). Cada filtro de
+    # igualdad va como prefijo para que el índice resuelva filtro + orden +
+    # LIMIT/keyset sin ordenar en memoria.
+    __table_args__ = (
+        Index(
+            "ix_activity_active_order",
+            due_date_key(due_date), priority.desc(), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+        Index(
+            "ix_activity_active_state_order",
+            state, due_date_key(due_date), priority.desc(), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+        Index(
+            "ix_activity_active_priority_order",
+            priority, due_date_key(due_date), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+        Index(
+            "ix_activity_active_category_order",
+            id_category, due_date_key(due_date), priority.desc(), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+        Index(
+            "ix_activity_active_user_order",
+            id_user, due_date_key(due_date), priority.desc(), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+        # Rama "creadas por mí" del listado de operadores
+        Index(
+            "ix_activity_active_creator_order",
+            created_by, due_date_key(due_date), priority.desc(), id_activity,
+            postgresql_where=text("is_active"), sqlite_where=text("is_active")
+        ),
+    )
+    
     def __repr__(self):
         return f"<Activity(id={self.id_activity}, title='{self.title}', state='{self.state}')>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -6,12 +6,15 @@ from app.database import Base
 
 
 class Historical(Base):
+    # En PostgreSQL la tabla está particionada por mes sobre created_at y su
+    # PK real es (id_historical, created_at); ver la migración e8a4c6b2d913
+    # y `python -m app.partitions`. id_historical sigue siendo único (secuencia).
     __tablename__ = "historical"
 
-    id_historical = Column(Integer, primary_key=True, index=True)
+    id_historical = Column(Integer, primary_key=True)
     
-    entity = Column(String(50), nullable=False, index=True) 
-    entity_id = Column(Integer, nullable=False, index=True) 
+    entity = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
     
     action = Column(String(20), nullable=False) 
     modified_field = Column(String(50), nullable=True) 
@@ -31,6 +34,12 @@ class Historical(Base):
         "User",
         back_populates="historical_records"
     )
+
+    # Línea de tiempo de una entidad: filtro de igualdad + orden del keyset
+    # (created_at DESC, id_historical DESC) resueltos por un solo índice
+    __table_args__ = (
+        Index("ix_historical_entity_timeline", entity, entity_id, created_at, id_historical),
+    )
     
     
     def __repr__(self):
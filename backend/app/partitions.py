@@ -0,0 +1,193 @@
+# app/partitions.py
+# Mantenimiento de las particiones mensuales de `historical` (PostgreSQL).
+#
+#   python -m app.partitions                      # crea las próximas y archiva las caducadas
+#   python -m app.partitions --dry-run            # solo muestra lo que haría
+#   python -m app.partitions --retention-months 6 --archive-dir /var/backups/historical
+#   python -m app.partitions --detach-only        # separa sin exportar ni borrar
+#
+# Pensado para ejecutarse a diario (cron). Es idempotente: crear una
+# partición que ya existe o archivar una que ya no está no hace nada, y una
+# partición que quedó separada (--detach-only, o un COPY que falló después
+# del DETACH) se retoma en la siguiente ejecución: se archiva si ha
+# caducado y, si no, se vuelve a adjuntar.
+
+import argparse
+import gzip
+import os
+import re
+import sys
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+
+PARTITION_NAME = re.compile(r"^historical_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"historical_y{month.year}m{month.month:02d}"
+
+
+def _by_month(names) -> dict[date, str]:
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def existing_partitions(conn) -> dict[date, str]:
+    """Particiones mensuales adjuntas a historical, por mes"""
+    return _by_month(conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'historical'
+    """)).scalars())
+
+
+def detached_partitions(conn) -> dict[date, str]:
+    """Tablas historical_yYYYYmMM separadas de historical (ya no heredan), por mes"""
+    return _by_month(conn.execute(text("""
+        SELECT c.relname
+        FROM pg_class c
+        WHERE c.relkind = 'r'
+          AND NOT c.relispartition
+          AND c.relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = current_schema())
+          AND c.relname LIKE 'historical\\_y%'
+    """)).scalars())
+
+
+def reattach(conn, retention_months: int, dry_run: bool) -> list[str]:
+    """Vuelve a adjuntar las separadas cuyo mes sigue dentro de la retención"""
+    cutoff = retention_cutoff(retention_months)
+    attached = []
+    for month, name in sorted(detached_partitions(conn).items()):
+        if month < cutoff:
+            continue
+        if not dry_run:
+            conn.execute(text(
+                f"ALTER TABLE historical ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+        attached.append(name)
+    return attached
+
+
+def create_future(conn, months_ahead: int, dry_run: bool) -> list[str]:
+    """Crea las particiones del mes actual y los `months_ahead` siguientes"""
+    existing = existing_partitions(conn)
+    current = date.today().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        if not dry_run:
+            # Falla si historical_default ya tiene filas de ese mes: es la
+            # señal de que el mantenimiento lleva tiempo sin ejecutarse
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF historical "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+        created.append(name)
+    return created
+
+
+def retention_cutoff(retention_months: int) -> date:
+    return add_months(date.today().replace(day=1), -retention_months)
+
+
+def expired(conn, retention_months: int) -> list[tuple[str, bool]]:
+    """
+    (partición, adjunta) de los meses enteros fuera de la retención,
+    incluidas las que quedaron separadas en una ejecución anterior
+    """
+    cutoff = retention_cutoff(retention_months)
+    months = {month: (name, True) for month, name in existing_partitions(conn).items()}
+    months.update({month: (name, False) for month, name in detached_partitions(conn).items()})
+    return [entry for month, entry in sorted(months.items()) if month < cutoff]
+
+
+def archive(name: str, attached: bool, archive_dir: str, detach_only: bool) -> str | None:
+    """
+    Separa la partición de historical (si sigue adjunta) y, salvo
+    `detach_only`, la exporta a `archive_dir/<partición>.csv.gz` (COPY) y
+    la borra. El fichero se escribe con otro nombre y se renombra al
+    terminar: nunca se borra una partición sin su copia completa en disco.
+    Si la exportación falla, la tabla queda separada y la próxima ejecución
+    la vuelve a intentar.
+    """
+    if attached:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE historical DETACH PARTITION {name}"))
+    if detach_only:
+        return None
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = path + ".partial"
+
+    raw = engine.raw_connection()
+    try:
+        with open(partial, "wb") as f:
+            with gzip.GzipFile(fileobj=f, mode="wb") as compressed:
+                raw.cursor().copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+        raw.cursor().execute(f"DROP TABLE {name}")
+        raw.commit()
+    finally:
+        raw.close()
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Particiones mensuales de historical")
+    parser.add_argument("--months-ahead", type=int, default=settings.historical_partitions_ahead,
+                        help="meses futuros con partición ya creada")
+    parser.add_argument("--retention-months", type=int, default=settings.historical_retention_months,
+                        help="meses completos que se conservan en la base de datos")
+    parser.add_argument("--archive-dir", default=settings.historical_archive_dir,
+                        help="directorio de los .csv.gz archivados")
+    parser.add_argument("--detach-only", action="store_true",
+                        help="separa las caducadas sin exportarlas ni borrarlas")
+    parser.add_argument("--dry-run", action="store_true", help="no modifica nada")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("El particionado de historical requiere PostgreSQL (DATABASE_URL)")
+
+    with engine.begin() as conn:
+        attached = reattach(conn, args.retention_months, args.dry_run)
+        created = create_future(conn, args.months_ahead, args.dry_run)
+        old = expired(conn, args.retention_months)
+
+    for name in attached:
+        print(f"readjuntada {name}")
+    for name in created:
+        print(f"creada {name}")
+    for name, is_attached in old:
+        if args.dry_run:
+            print(f"caducada {name}" + ("" if is_attached else " (separada)"))
+            continue
+        if args.detach_only and not is_attached:
+            continue
+        path = archive(name, is_attached, args.archive_dir, args.detach_only)
+        print(f"archivada {name} → {path}" if path else f"separada {name}")
+
+
+if __name__ == "__main__":
+    main()
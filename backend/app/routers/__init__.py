@@ -3,4 +3,5 @@
 from app.routers.auth import router as auth_router
 from app.routers.users import router as users_router
 from app.routers.categories import router as categories_router
-from app.routers.activities import router as activities_router
\ No newline at end of file
+from app.routers.activities import router as activities_router
+from app.routers.history import router as history_router
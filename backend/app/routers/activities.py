@@ -1,21 +1,33 @@
 # app/routers/activities.py
 
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Header, Response, UploadFile, status, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import date
 
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
 from app.models import User
 from app.models.activity import ActivityStateEnum, PriorityEnum
-from app.schemas import ActivityCreate, ActivityUpdate, ActivityChangeState, ActivityResponse, ActivityList
+from app.schemas import (
+    ActivityCreate, ActivityBulkCreate, ActivityBulkResult, ActivityImportResult, ActivityUpdate,
+    ActivityChangeState, ActivityBulkChangeState, ActivityBulkStateResult,
+    ActivityResponse, ActivityList, ActivitySortEnum, ActivityStats, ExportFormatEnum, HistoricalList
+)
 from app.services import activity as activity_service
+from app.services import historical as historical_service
+from app.services import importer as importer_service
+from app.services import stats as stats_service
 from app.utils import get_current_user
+from app.utils.etag import make_etag, etag_matches, if_match_value
+from app.utils.pagination import TotalModeEnum
+from app.utils.responses import ModelResponse
 
 router = APIRouter()
 
 
 @router.get("", response_model=ActivityList)
-def get_activities(
+async def get_activities(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     state: ActivityStateEnum | None = None,
@@ -26,66 +38,168 @@ def get_activities(
     due_date_to: date | None = None,
     search: str | None = None,
     include_inactive: bool = False,
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="Cursor opaco de `next_cursor`; si se envía, se ignora `skip`"),
+    total_mode: TotalModeEnum = TotalModeEnum.exact,
+    sort: ActivitySortEnum = ActivitySortEnum.due_date,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Lista actividades con filtros"""
-    return activity_service.get_all(
-        db, current_user, skip, limit,
+    activities = await run_db(
+        db, activity_service.get_all, current_user, skip, limit,
         state, priority, id_category, id_user,
+        due_date_from, due_date_to, search, include_inactive,
+        cursor, total_mode, sort
+    )
+    return ModelResponse(activities)
+
+
+@router.get("/stats", response_model=ActivityStats)
+async def get_activity_stats(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Totales para el dashboard (globales para admin, propios para operadores)"""
+    return await run_db(db, stats_service.get, current_user)
+
+
+@router.get("/export")
+async def export_activities(
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.csv, alias="format"),
+    state: ActivityStateEnum | None = None,
+    priority: PriorityEnum | None = None,
+    id_category: int | None = None,
+    id_user: int | None = None,
+    due_date_from: date | None = None,
+    due_date_to: date | None = None,
+    search: str | None = None,
+    include_inactive: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporta las actividades filtradas (mismos filtros que el listado) en streaming, sin paginar"""
+    batches = activity_service.export_rows(
+        current_user, state, priority, id_category, id_user,
         due_date_from, due_date_to, search, include_inactive
     )
+    if export_format == ExportFormatEnum.ndjson:
+        content, media_type = activity_service.export_ndjson(batches), "application/x-ndjson"
+    else:
+        content, media_type = activity_service.export_csv(batches), "text/csv; charset=utf-8"
+    return StreamingResponse(content, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="activities.{export_format.value}"'
+    })
 
 
 @router.get("/{activity_id}", response_model=ActivityResponse)
-def get_activity(
+async def get_activity(
     activity_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtiene una actividad por ID"""
-    return activity_service.get_by_id(db, activity_id, current_user)
+    """Obtiene una actividad por ID (ETag = versión; 304 si no cambió)"""
+    activity = await run_db(db, activity_service.get_by_id, activity_id, current_user)
+    etag = make_etag(activity.version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return activity
+
+
+@router.get("/{activity_id}/history", response_model=HistoricalList)
+async def get_activity_history(
+    activity_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="Cursor opaco de `next_cursor`"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Historial de cambios de una actividad, más recientes primero"""
+    return await run_db(db, historical_service.get_activity_history, activity_id, current_user, limit, cursor)
 
 
 @router.post("", response_model=ActivityResponse, status_code=status.HTTP_201_CREATED)
-def create_activity(
+async def create_activity(
     request: ActivityCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Crea una nueva actividad"""
-    return activity_service.create(db, request, current_user)
+    return await run_db(db, activity_service.create, request, current_user)
+
+
+@router.post("/bulk", response_model=ActivityBulkResult)
+async def create_activities_bulk(
+    request: ActivityBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Crea varias actividades; informa del resultado de cada elemento"""
+    return await run_db(db, activity_service.create_many, request, current_user)
+
+
+@router.post("/import", response_model=ActivityImportResult)
+async def import_activities(
+    file: UploadFile = File(..., description="CSV UTF-8 con cabecera: title, description, priority, due_date, category | id_category"),
+    current_user: User = Depends(get_current_user)
+):
+    """Importa actividades desde un CSV por lotes; las filas inválidas se informan sin abortar"""
+    return await run_in_threadpool(importer_service.import_csv, file.file, current_user)
 
 
 @router.put("/{activity_id}", response_model=ActivityResponse)
-def update_activity(
+async def update_activity(
     activity_id: int,
     request: ActivityUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Actualiza una actividad; con If-Match solo si la versión no cambió (412 si sí)"""
+    expected = if_match_value(if_match)
+    if expected is not None and not expected.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="La actividad fue modificada por otra petición; vuelve a cargarla"
+        )
+    activity = await run_db(
+        db, activity_service.update, activity_id, request, current_user,
+        int(expected) if expected is not None else None
+    )
+    response.headers["ETag"] = make_etag(activity.version)
+    return activity
+
+
+@router.patch("/state", response_model=ActivityBulkStateResult)
+async def change_activities_state(
+    request: ActivityBulkChangeState,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Actualiza una actividad"""
-    return activity_service.update(db, activity_id, request, current_user)
+    """Cambia el estado de varias actividades; informa de las rechazadas y por qué"""
+    return await run_db(db, activity_service.change_state_many, request, current_user)
 
 
 @router.patch("/{activity_id}/state", response_model=ActivityResponse)
-def change_activity_state(
+async def change_activity_state(
     activity_id: int,
     request: ActivityChangeState,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Cambia el estado de una actividad"""
-    return activity_service.change_state(db, activity_id, request, current_user)
+    return await run_db(db, activity_service.change_state, activity_id, request, current_user)
 
 
 @router.delete("/{activity_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_activity(
+async def delete_activity(
     activity_id: int,
     hard_delete: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Elimina una actividad"""
-    activity_service.delete(db, activity_id, current_user, hard_delete)
+    await run_db(db, activity_service.delete, activity_id, current_user, hard_delete)
     return None
\ No newline at end of file
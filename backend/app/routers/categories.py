@@ -1,67 +1,78 @@
 # app/routers/categories.py
 
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Header, Response, status, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
 from app.models import User
 from app.schemas import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryList
 from app.services import category as category_service
 from app.utils import get_current_user, get_current_admin
+from app.utils.etag import make_etag, etag_matches
+from app.utils.pagination import TotalModeEnum
+from app.utils.responses import ModelResponse
 
 router = APIRouter()
 
 
 @router.get("", response_model=CategoryList)
-def get_categories(
+async def get_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     include_inactive: bool = False,
-    db: Session = Depends(get_db),
+    total_mode: TotalModeEnum = TotalModeEnum.exact,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Lista todas las categorías"""
-    return category_service.get_all(db, current_user, skip, limit, include_inactive)
+    """Lista todas las categorías (ETag = versión del catálogo y de la consulta; 304 si no cambió)"""
+    etag = make_etag(await run_db(
+        db, category_service.list_version, current_user, skip, limit, include_inactive, total_mode
+    ))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    categories = await run_db(db, category_service.get_all, current_user, skip, limit, include_inactive, total_mode)
+    return ModelResponse(categories, headers={"ETag": etag})
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(
+async def get_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene una categoría por ID"""
-    return category_service.get_by_id(db, category_id, current_user)
+    return await run_db(db, category_service.get_by_id, category_id, current_user)
 
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-def create_category(
+async def create_category(
     request: CategoryCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Crea una nueva categoría (solo admin)"""
-    return category_service.create(db, request)
+    return await run_db(db, category_service.create, request, current_user)
 
 
 @router.patch("/{category_id}", response_model=CategoryResponse)
-def update_category(
+async def update_category(
     category_id: int,
     request: CategoryUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Actualiza una categoría (solo admin)"""
-    return category_service.update(db, category_id, request)
+    return await run_db(db, category_service.update, category_id, request, current_user)
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(
+async def delete_category(
     category_id: int,
     hard_delete: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Elimina una categoría (solo admin)"""
-    category_service.delete(db, category_id, hard_delete)
+    await run_db(db, category_service.delete, category_id, current_user, hard_delete)
     return None
\ No newline at end of file
@@ -0,0 +1,33 @@
+# app/routers/history.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import date
+
+from app.database import get_db, run_db
+from app.models import User
+from app.schemas import HistoricalList
+from app.services import historical as historical_service
+from app.utils import get_current_admin
+
+router = APIRouter()
+
+
+@router.get("", response_model=HistoricalList)
+async def get_history(
+    entity: str | None = Query(None, description="activity, category o user"),
+    entity_id: int | None = None,
+    id_user: int | None = Query(None, description="Usuario que hizo el cambio"),
+    action: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="Cursor opaco de `next_cursor`"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Auditoría de cambios, más recientes primero (solo admin)"""
+    return await run_db(
+        db, historical_service.get_all,
+        entity, entity_id, id_user, action, date_from, date_to, limit, cursor
+    )
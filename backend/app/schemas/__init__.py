@@ -19,14 +19,26 @@ from app.schemas.category import (
 from app.schemas.activity import (
     ActivityStateEnum,
     PriorityEnum,
+    ActivitySortEnum,
+    ExportFormatEnum,
     ActivityBase,
     ActivityCreate,
+    ActivityBulkCreate,
+    ActivityBulkItemResult,
+    ActivityBulkResult,
+    ActivityImportError,
+    ActivityImportResult,
     ActivityUpdate,
     ActivityChangeState,
+    ActivityBulkChangeState,
+    ActivityStateRejection,
+    ActivityBulkStateResult,
     ActivityResponse,
     ActivityDetailResponse,
     ActivityList,
     ActivityFilters,
+    CategoryCount,
+    ActivityStats,
 )
 
 from app.schemas.auth import (
@@ -17,6 +17,15 @@ class PriorityEnum(str, Enum):
     alta = "alta"
     urgente = "urgente"
 
+class ActivitySortEnum(str, Enum):
+    due_date = "due_date"    # fecha límite, prioridad, id
+    relevance = "relevance"  # relevancia de `search`
+
+class ExportFormatEnum(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"  # un objeto JSON por línea
+
+
 class ActivityBase(BaseModel):
     title: str = Field(min_length=2, max_length=200)
     description: str | None = None
@@ -29,6 +38,14 @@ class ActivityCreate(ActivityBase):
     pass
 
 
+MAX_BULK_ITEMS = 500
+
+
+class ActivityBulkCreate(BaseModel):
+    """POST /activities/bulk"""
+    items: list[ActivityCreate] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+
+
 class ActivityUpdate(BaseModel):
     """PATCH /activities/{id}"""
     title: str | None = Field(None, min_length=2, max_length=200)
@@ -43,12 +60,29 @@ class ActivityChangeState(BaseModel):
     """PATCH /activities/{id}/state"""
     state: ActivityStateEnum
 
+
+class ActivityBulkChangeState(BaseModel):
+    """PATCH /activities/state"""
+    ids: list[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+    state: ActivityStateEnum
+
+
+class ActivityStateRejection(BaseModel):
+    id_activity: int
+    reason: str
+
+
+class ActivityBulkStateResult(BaseModel):
+    updated: list[int]
+    rejected: list[ActivityStateRejection]
+
 class ActivityResponse(ActivityBase):
     """Actividad simple"""
     id_activity: int
     state: ActivityStateEnum
     created_by: int
     is_active: bool
+    version: int
     created_at: datetime
     updated_at: datetime
 
@@ -56,12 +90,57 @@ class ActivityResponse(ActivityBase):
         from_attributes = True
 
 
+class ActivityBulkItemResult(BaseModel):
+    """Resultado de un elemento; `index` es su posición en la petición"""
+    index: int
+    activity: ActivityResponse | None = None
+    error: str | None = None
+
+
+class ActivityBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: list[ActivityBulkItemResult]
+
+
+MAX_IMPORT_ERRORS = 1000
+
+
+class ActivityImportError(BaseModel):
+    """Fila rechazada; `line` es la línea del CSV donde termina (cabecera = 1)"""
+    line: int
+    error: str
+
+
+class ActivityImportResult(BaseModel):
+    """POST /activities/import; `errors` lista como mucho MAX_IMPORT_ERRORS"""
+    created: int
+    failed: int
+    errors: list[ActivityImportError]
+
+
 class ActivityList(BaseModel):
     """Lista paginada"""
     activities: list[ActivityResponse]
-    total: int
+    total: int | None
     page: int
     per_page: int
+    next_cursor: str | None = None
+
+class CategoryCount(BaseModel):
+    id_category: int | None
+    count: int
+
+
+class ActivityStats(BaseModel):
+    """GET /activities/stats (solo actividades activas)"""
+    total: int
+    by_state: dict[str, int]
+    by_priority: dict[str, int]
+    by_category: list[CategoryCount]
+    overdue: int          # vencidas y sin terminar
+    due_this_week: int    # vencen de hoy al domingo, sin terminar
+
 
 class ActivityDetailResponse(BaseModel):
     """Actividad con usuario y categoría expandidos"""
@@ -29,4 +29,4 @@ class CategoryResponse(CategoryBase):
 class CategoryList(BaseModel):
     """Lista de categorías"""
     categories: list[CategoryResponse]
-    total: int
\ No newline at end of file
+    total: int | None
\ No newline at end of file
@@ -31,6 +31,7 @@ class HistoricalWithUser(HistoricalBase):
 
 
 class HistoricalList(BaseModel):
-    """Lista de auditoría"""
+    """Lista de auditoría (más recientes primero, paginada por cursor)"""
     records: list[HistoricalResponse]
-    total: int
\ No newline at end of file
+    total: int | None = None
+    next_cursor: str | None = None
@@ -34,12 +34,12 @@ class UserResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class UserList(BaseModel):
     """Lista paginada"""
     users: list[UserResponse]
-    total: int
+    total: int | None
     page: int
     per_page: int
\ No newline at end of file
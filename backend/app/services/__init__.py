@@ -1,4 +1,5 @@
 from app.services import auth
 from app.services import user
 from app.services import category
-from app.services import activity
\ No newline at end of file
+from app.services import activity
+from app.services import historical
@@ -1,13 +1,28 @@
 # app/services/activity.py
 
+import csv
+import io
+from typing import Iterator
+
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import Row, select, insert, update as sql_update, union_all, or_, and_
 from fastapi import HTTPException, status
 from datetime import date
 
-from app.models import User, Activity, Category
-from app.models.activity import ActivityStateEnum, PriorityEnum
-from app.schemas import ActivityCreate, ActivityUpdate, ActivityChangeState, ActivityList
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.models import User, Activity
+from app.models.activity import ActivityStateEnum, PriorityEnum, DUE_DATE_LAST, due_date_key
+from app.schemas import (
+    ActivityCreate, ActivityBulkCreate, ActivityBulkItemResult, ActivityBulkResult,
+    ActivityBulkChangeState, ActivityBulkStateResult, ActivityStateRejection,
+    ActivityUpdate, ActivityChangeState, ActivityResponse, ActivityList, ActivitySortEnum
+)
+from app.utils.pagination import TotalModeEnum, encode_cursor, decode_cursor, count_cache_key, fetch_page, as_dicts
+from app.utils.search import search_tokens, search_filter, search_rank
+from app.services import audit, stats
+from app.services.stats import ActivityRow
+from app.services.catalog import catalog
 
 
 # ============================================
@@ -28,6 +43,196 @@ def validate_state_transition(current_state: str, new_state: str) -> bool:
     return new_state in VALID_TRANSITIONS.get(current_state, [])
 
 
+# La misma tabla, invertida: estado destino → estados de origen permitidos.
+# Permite validar la transición en el WHERE del UPDATE (state IN ...).
+ALLOWED_SOURCES = {
+    target: [source for source, targets in VALID_TRANSITIONS.items() if target in targets]
+    for target in VALID_TRANSITIONS
+}
+
+
+def _state_change_conditions(new_state: str, current_user: User) -> list:
+    """Transición válida + permiso (asignada o creada por el operador)"""
+    conditions = [Activity.state.in_(ALLOWED_SOURCES[new_state])]
+    if current_user.role.value != "admin":
+        me = current_user.id_user
+        conditions.append(or_(Activity.id_user == me, Activity.created_by == me))
+    return conditions
+
+
+def _state_rejection(activity, new_state: str, current_user: User) -> tuple[int, str]:
+    """
+    Motivo por el que el UPDATE condicional no tocó `activity` (fila de la
+    lectura de diagnóstico, o None si no existe): (status, detalle).
+    """
+    if activity is None:
+        return status.HTTP_404_NOT_FOUND, "Actividad no encontrada"
+
+    if current_user.role.value != "admin":
+        if activity.id_user != current_user.id_user and activity.created_by != current_user.id_user:
+            return status.HTTP_403_FORBIDDEN, "No tienes permiso para cambiar el estado de esta actividad"
+
+    current_state = activity.state.value
+    if validate_state_transition(current_state, new_state):
+        # Otra petición la cambió entre el UPDATE y esta lectura
+        return status.HTTP_409_CONFLICT, "La actividad cambió durante la operación, reintenta"
+
+    return (
+        status.HTTP_400_BAD_REQUEST,
+        f"Transición inválida: {current_state} → {new_state}. "
+        f"Permitidas: {VALID_TRANSITIONS[current_state]}"
+    )
+
+
+# ============================================
+# LECTURA SIN ORM
+# ============================================
+# Listado y detalle seleccionan solo las columnas de ActivityResponse (más
+# id_user, para los permisos) y devuelven Row: tuplas con acceso por
+# nombre, sin identity map, estado de instancia ni descriptores de
+# relaciones. El listado las convierte a dicts con as_dicts antes de
+# construir ActivityList: pydantic valida un dict bastante más rápido que
+# leyendo atributos de Row con from_attributes. El detalle (una fila)
+# devuelve el Row tal cual. Las escrituras siguen usando el ORM.
+
+READ_COLUMNS = [getattr(Activity, name) for name in ActivityResponse.model_fields] + [Activity.id_user]
+
+
+# ============================================
+# KEYSET PAGINATION
+# ============================================
+# Orden estable: due_date ASC NULLS LAST, priority DESC, id_activity ASC.
+# El id como desempate garantiza que ninguna fila se repita ni se salte
+# entre páginas. La fecha se ordena por due_date_key (NULL = fecha máxima),
+# la misma expresión que los índices del listado.
+
+SEARCH_COLUMNS = [Activity.title, Activity.description]
+
+
+def _order_by(entity=Activity) -> tuple:
+    """Orden del listado sobre Activity o sobre las columnas de la unión"""
+    return (
+        due_date_key(entity.due_date).asc(),
+        entity.priority.desc(),
+        entity.id_activity.asc(),
+    )
+
+
+def _cursor_for(activity: Row) -> str:
+    """Cursor que apunta justo después de esta actividad"""
+    return encode_cursor([activity.due_date, activity.priority.value, activity.id_activity])
+
+
+def _seek_after(cursor: str):
+    """Predicado 'fila posterior al cursor' compatible con el índice de orden"""
+    raw_due_date, raw_priority, raw_id = decode_cursor(cursor, 3)
+    try:
+        due_date = date.fromisoformat(raw_due_date) if raw_due_date is not None else DUE_DATE_LAST
+        priority = PriorityEnum(raw_priority)
+        id_activity = int(raw_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+    # `clave >= fecha` es el límite inferior del recorrido del índice (Index
+    # Cond); el resto descarta, dentro de la misma fecha, lo ya servido
+    key = due_date_key(Activity.due_date)
+    return and_(
+        key >= due_date,
+        or_(
+            key > due_date,
+            Activity.priority < priority,
+            and_(Activity.priority == priority, Activity.id_activity > id_activity)
+        )
+    )
+
+
+# ============================================
+# VISIBILIDAD
+# ============================================
+# Un operador ve lo que tiene asignado o lo que creó. En lugar de
+# OR(id_user = me, created_by = me), que obliga a un BitmapOr o a un seq
+# scan, se consulta UNION ALL de dos ramas disjuntas, cada una servida por
+# su índice (id_user / created_by + orden). La segunda rama excluye lo que
+# ya trae la primera, así no hace falta deduplicar.
+
+def _visibility_branches(current_user: User) -> list:
+    me = current_user.id_user
+    return [
+        Activity.id_user == me,
+        and_(
+            Activity.created_by == me,
+            or_(Activity.id_user.is_(None), Activity.id_user != me)
+        ),
+    ]
+
+
+def _listing(db: Session, current_user: User, conditions: list, branch_limit: int | None = None):
+    """
+    Query de READ_COLUMNS de las actividades visibles que cumplen `conditions`.
+
+    Devuelve (query, columnas) donde las columnas son Activity o las de la
+    unión, para ordenar sobre ellas. Con `branch_limit` cada rama se
+    ordena y recorta por su cuenta (top-N por índice antes de unir).
+    """
+    if current_user.role.value == "admin":
+        return db.query(*READ_COLUMNS).filter(*conditions), Activity
+
+    branches = []
+    for visibility in _visibility_branches(current_user):
+        branch = select(*READ_COLUMNS).where(visibility, *conditions)
+        if branch_limit is not None:
+            branch = select(branch.order_by(*_order_by()).limit(branch_limit).subquery())
+        branches.append(branch)
+
+    visible = union_all(*branches).subquery("visible").c
+    return db.query(*visible), visible
+
+
+def _filter_conditions(
+    db: Session,
+    state: ActivityStateEnum | None,
+    priority: PriorityEnum | None,
+    id_category: int | None,
+    id_user: int | None,
+    due_date_from: date | None,
+    due_date_to: date | None,
+    tokens: list[str],
+    include_inactive: bool
+) -> list:
+    """Filtros del listado (sin visibilidad) como lista de predicados"""
+    conditions = []
+    
+    # Soft delete
+    if not include_inactive:
+        conditions.append(Activity.is_active == True)
+    
+    if state:
+        conditions.append(Activity.state == state)
+    
+    if priority:
+        conditions.append(Activity.priority == priority)
+    
+    if id_category:
+        conditions.append(Activity.id_category == id_category)
+    
+    if id_user:
+        conditions.append(Activity.id_user == id_user)
+    
+    if due_date_from:
+        conditions.append(Activity.due_date >= due_date_from)
+    
+    if due_date_to:
+        conditions.append(Activity.due_date <= due_date_to)
+    
+    if tokens:
+        conditions.append(search_filter(db, SEARCH_COLUMNS, tokens))
+    
+    return conditions
+
+
 # ============================================
 # SERVICIOS
 # ============================================
@@ -44,71 +249,83 @@ def get_all(
     due_date_from: date | None = None,
     due_date_to: date | None = None,
     search: str | None = None,
-    include_inactive: bool = False
+    include_inactive: bool = False,
+    cursor: str | None = None,
+    total_mode: TotalModeEnum = TotalModeEnum.exact,
+    sort: ActivitySortEnum = ActivitySortEnum.due_date
 ) -> ActivityList:
-    """Lista actividades con filtros"""
-    
-    query = db.query(Activity)
-    
-    # Operadores solo ven sus actividades
-    if current_user.role.value != "admin":
-        query = query.filter(
-            or_(
-                Activity.id_user == current_user.id_user,
-                Activity.created_by == current_user.id_user
-            )
+    """
+    Lista actividades con filtros.
+
+    Con `cursor` se pagina por keyset (se ignora `skip`); `next_cursor`
+    se devuelve siempre que haya más filas, en ambos modos. El orden por
+    relevancia solo aplica con `search` y no admite cursor.
+    """
+    
+    tokens = search_tokens(search)
+    by_relevance = sort == ActivitySortEnum.relevance and bool(tokens)
+    if by_relevance and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El orden por relevancia no admite cursor"
         )
     
-    # Soft delete
-    if not include_inactive:
-        query = query.filter(Activity.is_active == True)
-    
-    # Filtros
-    if state:
-        query = query.filter(Activity.state == state)
-    
-    if priority:
-        query = query.filter(Activity.priority == priority)
+    conditions = _filter_conditions(
+        db, state, priority, id_category, id_user,
+        due_date_from, due_date_to, tokens, include_inactive
+    )
     
-    if id_category:
-        query = query.filter(Activity.id_category == id_category)
+    if cursor:
+        skip = 0
     
-    if id_user:
-        query = query.filter(Activity.id_user == id_user)
+    # El total exacto sin cursor sale de COUNT(*) OVER () sobre la página,
+    # que necesita la unión completa; en el resto de casos las ramas se
+    # pueden recortar a las filas que la página podría llegar a usar
+    windowed_total = total_mode == TotalModeEnum.exact and not cursor
+    branch_limit = None if by_relevance or windowed_total else skip + limit + 1
     
-    if due_date_from:
-        query = query.filter(Activity.due_date >= due_date_from)
-    
-    if due_date_to:
-        query = query.filter(Activity.due_date <= due_date_to)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Activity.title.ilike(search_term),
-                Activity.description.ilike(search_term)
-            )
-        )
+    page_conditions = conditions + [_seek_after(cursor)] if cursor else conditions
+    query, entity = _listing(db, current_user, page_conditions, branch_limit)
     
     # Ordenar
-    query = query.order_by(Activity.due_date.asc().nullslast(), Activity.priority.desc())
+    if by_relevance:
+        rank = search_rank(db, [entity.title, entity.description], tokens)
+        query = query.order_by(rank.desc(), *_order_by(entity))
+    else:
+        query = query.order_by(*_order_by(entity))
+    
+    count_query = None
+    if cursor or branch_limit is not None:
+        count_query, _ = _listing(db, current_user, conditions)
+    
+    cache_key = count_cache_key(
+        "activity",
+        scope=None if current_user.role.value == "admin" else current_user.id_user,
+        state=state, priority=priority, id_category=id_category, id_user=id_user,
+        due_date_from=due_date_from, due_date_to=due_date_to, search=search,
+        include_inactive=include_inactive
+    )
     
-    total = query.count()
-    activities = query.offset(skip).limit(limit).all()
+    # Una fila extra indica si existe página siguiente
+    activities, total = fetch_page(db, query, skip, limit + 1, total_mode, cache_key, count_query)
+    has_more = len(activities) > limit
+    activities = activities[:limit]
     
     return ActivityList(
-        activities=activities,
+        activities=as_dicts(activities),
         total=total,
         page=(skip // limit) + 1,
-        per_page=limit
+        per_page=limit,
+        next_cursor=_cursor_for(activities[-1]) if has_more and not by_relevance else None
     )
 
 
-def get_by_id(db: Session, activity_id: int, current_user: User) -> Activity:
-    """Obtiene una actividad por ID"""
+def get_by_id(db: Session, activity_id: int, current_user: User) -> Row:
+    """Obtiene una actividad por ID (solo lectura: READ_COLUMNS)"""
     
-    activity = db.query(Activity).filter(Activity.id_activity == activity_id).first()
+    activity = db.execute(
+        select(*READ_COLUMNS).where(Activity.id_activity == activity_id)
+    ).first()
     
     if not activity:
         raise HTTPException(
@@ -130,17 +347,12 @@ def get_by_id(db: Session, activity_id: int, current_user: User) -> Activity:
 def create(db: Session, request: ActivityCreate, current_user: User) -> Activity:
     """Crea una nueva actividad"""
     
-    # Verificar categoría
-    if request.id_category:
-        category = db.query(Category).filter(
-            Category.id_category == request.id_category,
-            Category.is_active == True
-        ).first()
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Categoría no encontrada o inactiva"
-            )
+    # Verificar categoría (catálogo en memoria)
+    if request.id_category and not catalog.is_active(db, request.id_category):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Categoría no encontrada o inactiva"
+        )
     
     new_activity = Activity(
         **request.model_dump(),
@@ -152,107 +364,298 @@ def create(db: Session, request: ActivityCreate, current_user: User) -> Activity
     db.add(new_activity)
     db.commit()
     db.refresh(new_activity)
+    audit.record_changes("activity", new_activity.id_activity, "create", current_user.id_user)
+    stats.activity_changed(None, ActivityRow.of(new_activity))
     
     return new_activity
 
 
-def update(db: Session, activity_id: int, request: ActivityUpdate, current_user: User) -> Activity:
-    """Actualiza una actividad"""
-    
-    activity = db.query(Activity).filter(Activity.id_activity == activity_id).first()
-    
-    if not activity:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Actividad no encontrada"
+def create_many(db: Session, request: ActivityBulkCreate, current_user: User) -> ActivityBulkResult:
+    """
+    Crea varias actividades en una transacción.
+
+    Las categorías se validan contra el catálogo en memoria y las filas válidas se
+    insertan con INSERT ... RETURNING multi-fila (insertmanyvalues de
+    SQLAlchemy; en PostgreSQL, lotes de cientos de filas por sentencia).
+    Un elemento con categoría inexistente o inactiva no aborta el resto:
+    se informa en su posición de `results`.
+    """
+
+    active_categories = catalog.active_ids(
+        db, {item.id_category for item in request.items if item.id_category}
+    )
+
+    results = [ActivityBulkItemResult(index=i) for i in range(len(request.items))]
+    rows, row_indexes = [], []
+    for i, item in enumerate(request.items):
+        if item.id_category and item.id_category not in active_categories:
+            results[i].error = "Categoría no encontrada o inactiva"
+            continue
+        rows.append({
+            **item.model_dump(),
+            "id_user": current_user.id_user,
+            "created_by": current_user.id_user,
+            "state": ActivityStateEnum.pendiente,
+            "is_active": True,
+        })
+        row_indexes.append(i)
+
+    if rows:
+        created = db.scalars(
+            insert(Activity).returning(Activity, sort_by_parameter_order=True),
+            rows
+        ).all()
+        db.commit()
+        for i, activity in zip(row_indexes, created):
+            results[i].activity = ActivityResponse.model_validate(activity)
+            audit.record_changes("activity", activity.id_activity, "create", current_user.id_user)
+            stats.activity_changed(None, ActivityRow.of(activity))
+
+    return ActivityBulkResult(
+        created=len(rows),
+        failed=len(results) - len(rows),
+        results=results
+    )
+
+
+def _update_returning_previous(
+    db: Session,
+    conditions: list,
+    values: dict,
+    fields: list[str]
+) -> list[tuple[Activity, dict]]:
+    """
+    UPDATE activity SET `values` WHERE `conditions`; devuelve cada fila
+    actualizada con el valor previo de `fields` (para la auditoría).
+
+    En PostgreSQL todo va en una sentencia: UPDATE ... FROM (SELECT ...
+    FOR UPDATE) AS previous RETURNING activity.*, previous.*. SQLite no
+    permite usar las tablas del FROM en RETURNING, así que ahí los valores
+    previos se leen antes en la misma transacción (base de datos local,
+    sin ida y vuelta por red).
+    """
+    columns = [getattr(Activity, field) for field in fields]
+
+    if db.get_bind().dialect.name == "postgresql":
+        previous = (
+            select(Activity.id_activity, *columns)
+            .where(*conditions)
+            .with_for_update()
+            .subquery("previous")
         )
-    
+        rows = db.execute(
+            sql_update(Activity)
+            .where(Activity.id_activity == previous.c.id_activity)
+            .values(values)
+            .returning(Activity, *(previous.c[field] for field in fields))
+            .execution_options(synchronize_session=False)
+        ).all()
+        return [(row[0], dict(zip(fields, row[1:]))) for row in rows]
+
+    previous = {}
+    if fields:
+        previous = {
+            row.id_activity: row._mapping
+            for row in db.execute(select(Activity.id_activity, *columns).where(*conditions))
+        }
+    activities = db.scalars(
+        sql_update(Activity).where(*conditions).values(values).returning(Activity)
+    ).all()
+    return [
+        (activity, {field: previous[activity.id_activity][field] for field in fields} if fields else {})
+        for activity in activities
+    ]
+
+
+def update(
+    db: Session,
+    activity_id: int,
+    request: ActivityUpdate,
+    current_user: User,
+    expected_version: int | None = None
+) -> Activity:
+    """
+    Actualiza una actividad.
+
+    Un único UPDATE ... RETURNING: permiso, usuario asignado activo y,
+    con `expected_version` (If-Match), la versión van en el WHERE; la
+    categoría se valida antes contra el catálogo en memoria. Si no
+    actualiza nada, una lectura de diagnóstico decide el error (412 si otra
+    escritura cambió la versión).
+    """
+
+    conditions = [Activity.id_activity == activity_id]
+
     # Permisos
     if current_user.role.value != "admin":
-        if activity.created_by != current_user.id_user:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Solo el creador o un admin puede editar esta actividad"
-            )
-    
-    # Verificar categoría
-    if request.id_category:
-        category = db.query(Category).filter(
-            Category.id_category == request.id_category,
-            Category.is_active == True
-        ).first()
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Categoría no encontrada o inactiva"
-            )
-    
-    # Verificar usuario asignado
+        conditions.append(Activity.created_by == current_user.id_user)
+
+    if expected_version is not None:
+        conditions.append(Activity.version == expected_version)
+
+    # Categoría contra el catálogo; usuario asignado en la misma sentencia
+    if request.id_category and not catalog.is_active(db, request.id_category):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Categoría no encontrada o inactiva"
+        )
     if request.id_user:
-        assigned_user = db.query(User).filter(
-            User.id_user == request.id_user,
-            User.is_active == True
-        ).first()
-        if not assigned_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Usuario asignado no encontrado o inactivo"
-            )
-    
-    # Actualizar
+        conditions.append(_active_user(request.id_user).exists())
+
     update_data = request.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(activity, field, value)
-    
+    updated = _update_returning_previous(
+        db, conditions, {**update_data, "version": Activity.version + 1}, list(update_data)
+    )
+
+    if not updated:
+        status_code, detail = _update_rejection(db, activity_id, request, current_user, expected_version)
+        db.rollback()
+        raise HTTPException(status_code=status_code, detail=detail)
+
     db.commit()
-    db.refresh(activity)
-    
+
+    activity, previous = updated[0]
+    audit.record_changes(
+        "activity", activity.id_activity, "update", current_user.id_user,
+        previous, {field: getattr(activity, field) for field in update_data}
+    )
+    stats.activity_changed(ActivityRow.of(activity, **previous), ActivityRow.of(activity))
+
     return activity
 
 
+def _active_user(id_user: int):
+    return select(User.id_user).where(
+        User.id_user == id_user,
+        User.is_active == True
+    )
+
+
+def _update_rejection(
+    db: Session,
+    activity_id: int,
+    request: ActivityUpdate,
+    current_user: User,
+    expected_version: int | None
+) -> tuple[int, str]:
+    """Motivo por el que el UPDATE de `update` no tocó ninguna fila"""
+
+    activity = db.execute(
+        select(Activity.created_by, Activity.version).where(Activity.id_activity == activity_id)
+    ).first()
+
+    if activity is None:
+        return status.HTTP_404_NOT_FOUND, "Actividad no encontrada"
+
+    if current_user.role.value != "admin" and activity.created_by != current_user.id_user:
+        return status.HTTP_403_FORBIDDEN, "Solo el creador o un admin puede editar esta actividad"
+
+    if expected_version is not None and activity.version != expected_version:
+        return (
+            status.HTTP_412_PRECONDITION_FAILED,
+            "La actividad fue modificada por otra petición; vuelve a cargarla"
+        )
+
+    if request.id_user and db.scalar(_active_user(request.id_user)) is None:
+        return status.HTTP_400_BAD_REQUEST, "Usuario asignado no encontrado o inactivo"
+
+    # Cambió entre el UPDATE y esta lectura
+    return status.HTTP_409_CONFLICT, "La actividad cambió durante la operación, reintenta"
+
+
 def change_state(
     db: Session,
     activity_id: int,
     request: ActivityChangeState,
     current_user: User
 ) -> Activity:
-    """Cambia el estado de una actividad"""
-    
-    activity = db.query(Activity).filter(Activity.id_activity == activity_id).first()
-    
-    if not activity:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Actividad no encontrada"
-        )
-    
-    # Permisos
-    if current_user.role.value != "admin":
-        if activity.id_user != current_user.id_user and activity.created_by != current_user.id_user:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para cambiar el estado de esta actividad"
-            )
-    
-    # Validar transición
-    current_state = activity.state.value
+    """
+    Cambia el estado de una actividad.
+
+    Un único UPDATE ... WHERE id AND state IN (orígenes permitidos) AND
+    permiso RETURNING: la validación ocurre en la misma sentencia que la
+    escritura, así dos transiciones concurrentes no pueden validarse ambas
+    contra un estado viejo. Solo si no actualiza nada se lee la fila para
+    devolver el error adecuado.
+    """
+
     new_state = request.state.value
-    
-    if not validate_state_transition(current_state, new_state):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Transición inválida: {current_state} → {new_state}. "
-                   f"Permitidas: {VALID_TRANSITIONS[current_state]}"
-        )
-    
-    activity.state = request.state
-    
+
+    updated = _update_returning_previous(
+        db,
+        [Activity.id_activity == activity_id, *_state_change_conditions(new_state, current_user)],
+        {"state": new_state, "version": Activity.version + 1},
+        ["state"]
+    )
+
+    if not updated:
+        row = db.execute(
+            select(Activity.id_activity, Activity.state, Activity.id_user, Activity.created_by)
+            .where(Activity.id_activity == activity_id)
+        ).first()
+        db.rollback()
+        status_code, detail = _state_rejection(row, new_state, current_user)
+        raise HTTPException(status_code=status_code, detail=detail)
+
     db.commit()
-    db.refresh(activity)
-    
+
+    activity, previous = updated[0]
+    audit.record_changes(
+        "activity", activity.id_activity, "change_state", current_user.id_user,
+        previous, {"state": activity.state}
+    )
+    stats.activity_changed(ActivityRow.of(activity, **previous), ActivityRow.of(activity))
+
     return activity
 
 
+def change_state_many(
+    db: Session,
+    request: ActivityBulkChangeState,
+    current_user: User
+) -> ActivityBulkStateResult:
+    """
+    Cambia el estado de varias actividades con un solo UPDATE condicional:
+    permiso y transición van en el WHERE y RETURNING dice cuáles cambiaron.
+    Solo si alguna queda fuera se lee su estado para explicar el motivo.
+    """
+
+    ids = list(dict.fromkeys(request.ids))
+    new_state = request.state.value
+
+    changes = _update_returning_previous(
+        db,
+        [Activity.id_activity.in_(ids), *_state_change_conditions(new_state, current_user)],
+        {"state": new_state, "version": Activity.version + 1},
+        ["state"]
+    )
+    db.commit()
+
+    updated = [activity.id_activity for activity, _ in changes]
+    for activity, previous in changes:
+        audit.record_changes(
+            "activity", activity.id_activity, "change_state", current_user.id_user,
+            previous, {"state": activity.state}
+        )
+        stats.activity_changed(ActivityRow.of(activity, **previous), ActivityRow.of(activity))
+
+    rejected = []
+    missing = [i for i in ids if i not in set(updated)]
+    if missing:
+        found = {
+            row.id_activity: row
+            for row in db.execute(
+                select(Activity.id_activity, Activity.state, Activity.id_user, Activity.created_by)
+                .where(Activity.id_activity.in_(missing))
+            )
+        }
+        for activity_id in missing:
+            _, reason = _state_rejection(found.get(activity_id), new_state, current_user)
+            rejected.append(ActivityStateRejection(id_activity=activity_id, reason=reason))
+
+    return ActivityBulkStateResult(updated=sorted(updated), rejected=rejected)
+
+
 def delete(db: Session, activity_id: int, current_user: User, hard_delete: bool = False) -> None:
     """Elimina una actividad"""
     
@@ -272,9 +675,96 @@ def delete(db: Session, activity_id: int, current_user: User, hard_delete: bool
                 detail="Solo el creador o un admin puede eliminar esta actividad"
             )
     
-    if hard_delete and current_user.role.value == "admin":
+    was_active = activity.is_active
+    before = ActivityRow.of(activity)
+    hard_delete = hard_delete and current_user.role.value == "admin"
+    if hard_delete:
         db.delete(activity)
     else:
         activity.is_active = False
+        activity.version = Activity.version + 1
+    
+    db.commit()
+    stats.activity_changed(before, None)
     
-    db.commit()
\ No newline at end of file
+    if hard_delete:
+        audit.record_changes("activity", activity_id, "delete", current_user.id_user)
+    else:
+        audit.record_changes(
+            "activity", activity_id, "delete", current_user.id_user,
+            {"is_active": was_active}, {"is_active": False}
+        )
+
+
+# ============================================
+# EXPORTACIÓN (CSV / NDJSON)
+# ============================================
+# Mismos filtros y visibilidad que get_all, sin paginar: una sola consulta
+# en el orden del listado, leída por lotes (yield_per; en PostgreSQL, cursor
+# de servidor) y emitida lote a lote. La memoria no depende del total.
+
+EXPORT_COLUMNS = list(ActivityResponse.model_fields)
+
+# Una celda que empieza así es una fórmula al abrir el CSV en una hoja de
+# cálculo; se antepone una comilla
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def export_rows(
+    current_user: User,
+    state: ActivityStateEnum | None = None,
+    priority: PriorityEnum | None = None,
+    id_category: int | None = None,
+    id_user: int | None = None,
+    due_date_from: date | None = None,
+    due_date_to: date | None = None,
+    search: str | None = None,
+    include_inactive: bool = False
+) -> Iterator[list[ActivityResponse]]:
+    """
+    Lotes de actividades visibles que cumplen los filtros.
+
+    Abre su propia sesión de lectura (réplica, si la hay): el generador se
+    consume mientras se envía la respuesta, después de que la ruta haya
+    devuelto.
+    """
+    with ReadSessionLocal() as db:
+        conditions = _filter_conditions(
+            db, state, priority, id_category, id_user,
+            due_date_from, due_date_to, search_tokens(search), include_inactive
+        )
+        query, entity = _listing(db, current_user, conditions)
+        statement = query.order_by(*_order_by(entity)).statement
+        result = db.execute(statement.execution_options(yield_per=settings.export_batch_size))
+        for rows in result.partitions():
+            yield [ActivityResponse.model_validate(row) for row in as_dicts(rows)]
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    value = str(value)
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def export_csv(batches: Iterator[list[ActivityResponse]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        for activity in batch:
+            record = activity.model_dump(mode="json")
+            writer.writerow([_csv_cell(record[column]) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Cabecera sola si no hubo filas
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_ndjson(batches: Iterator[list[ActivityResponse]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(activity.__pydantic_serializer__.to_json(activity) + b"\n" for activity in batch)
@@ -0,0 +1,178 @@
+# app/services/audit.py
+
+import enum
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+from app.models import Historical
+from app.utils.metrics import registry
+
+logger = logging.getLogger("app.audit")
+
+
+# ============================================
+# AUDITORÍA ASÍNCRONA (tabla historical)
+# ============================================
+# Los servicios llaman a record_changes() después del commit: solo se
+# encola en memoria. Un hilo agrupa los registros y los inserta por lotes
+# (INSERT multi-fila) cada audit_batch_size registros o cada
+# audit_flush_interval_seconds, lo que ocurra antes.
+#
+# La auditoría nunca añade una ida y vuelta a la escritura ni la bloquea:
+# si la cola está llena el registro se descarta (y se cuenta). Lo que haya
+# en la cola al apagar se vacía en stop(); una caída del proceso lo pierde.
+
+AUDIT_RECORDS = registry.counter(
+    "audit_records_total", "Registros de auditoría por resultado", ("outcome",))
+
+
+def _as_text(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return str(value.value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def record_changes(
+    entity: str,
+    entity_id: int,
+    action: str,
+    id_user: int,
+    before: dict | None = None,
+    after: dict | None = None
+) -> None:
+    """
+    Encola un registro por campo que cambió entre `before` y `after`.
+    Sin campos (alta, baja definitiva) se encola un único registro.
+
+    Uso:
+        audit.record_changes("activity", 7, "update", current_user.id_user,
+                             {"title": "antes"}, {"title": "después"})
+    """
+    before, after = before or {}, after or {}
+    created_at = datetime.now(timezone.utc)
+    base = {"entity": entity, "entity_id": entity_id, "action": action,
+            "id_user": id_user, "created_at": created_at}
+
+    if not before and not after:
+        writer.put({**base, "modified_field": None, "previous_value": None, "new_value": None})
+        return
+
+    for field in after:
+        previous, new = _as_text(before.get(field)), _as_text(after[field])
+        if previous != new:
+            writer.put({**base, "modified_field": field, "previous_value": previous, "new_value": new})
+
+
+def write_created(db: Session, entity: str, ids: list[int], id_user: int) -> None:
+    """
+    Registros de alta escritos en la transacción de `db`, sin pasar por la
+    cola: una importación masiva la desbordaría y se descartarían.
+    """
+    if not ids:
+        return
+    created_at = datetime.now(timezone.utc)
+    db.execute(insert(Historical), [
+        {"entity": entity, "entity_id": entity_id, "action": "create", "id_user": id_user,
+         "created_at": created_at, "modified_field": None, "previous_value": None, "new_value": None}
+        for entity_id in ids
+    ])
+
+
+class AuditWriter:
+    """Cola acotada + hilo que inserta por lotes en historical"""
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def put(self, row: dict) -> None:
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            AUDIT_RECORDS.inc(outcome="dropped")
+            logger.warning("cola de auditoría llena: registro descartado", extra={"fields": {
+                "entity": row["entity"], "entity_id": row["entity_id"], "action": row["action"],
+            }})
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo tras escribir lo pendiente"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self) -> list[dict]:
+        """Espera el primer registro y agrupa hasta llenar el lote o agotar el intervalo"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopping.is_set():
+                remaining = 0
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[dict]) -> None:
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(Historical), batch)
+        except Exception:
+            AUDIT_RECORDS.inc(len(batch), outcome="failed")
+            logger.exception("no se pudo escribir el lote de auditoría", extra={"fields": {"records": len(batch)}})
+        else:
+            AUDIT_RECORDS.inc(len(batch), outcome="written")
+
+
+writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    max_queue=settings.audit_queue_size,
+)
+
+
+def start_audit_writer() -> None:
+    writer.start()
+
+
+def stop_audit_writer() -> None:
+    writer.stop()
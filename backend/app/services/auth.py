@@ -2,7 +2,14 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models import User
 from app.schemas import RegisterRequest, RoleEnum, LoginRequest, Token
-from app.utils import hash_password, verify_password, create_access_token, get_current_user, get_current_admin
+from app.utils import hash_password, verify_password, needs_rehash, create_access_token, get_current_user, get_current_admin
+
+
+def _rehash_if_needed(db: Session, user: User, password: str) -> None:
+    """Actualiza el hash si se guardó con un coste distinto al calibrado"""
+    if needs_rehash(user.password):
+        user.password = hash_password(password)
+        db.commit()
 
 
 def register_user(request: RegisterRequest, db: Session) -> User:
@@ -46,6 +53,8 @@ def login_user(request: LoginRequest, db: Session) -> Token:
             detail="Usuario desactivado"
         )
     
+    _rehash_if_needed(db, user, request.password)
+    
     access_token = create_access_token(
         data={
             "sub": str(user.id_user),
@@ -73,6 +82,8 @@ def login_with_form(username: str, password: str, db: Session) -> Token:
             detail="Usuario desactivado"
         )
     
+    _rehash_if_needed(db, user, password)
+    
     access_token = create_access_token(
         data={
             "sub": user.id_user,
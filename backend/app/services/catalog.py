@@ -0,0 +1,155 @@
+# app/services/catalog.py
+
+import asyncio
+import hashlib
+import threading
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from app.config import settings
+from app.database import SessionLocal, use_primary
+from app.models import Category
+from app.schemas import CategoryResponse
+
+
+# ============================================
+# CATÁLOGO DE CATEGORÍAS EN MEMORIA
+# ============================================
+# Las categorías cambian muy poco y se consultan en cada listado y en cada
+# alta/edición de actividad. El catálogo las carga todas con un SELECT y
+# sirve listados y validaciones desde memoria.
+#
+# - category.create/update/delete lo invalidan tras el commit;
+# - otros workers lo recargan al caducar (category_catalog_ttl_seconds); una
+#   sola carga a la vez, las demás peticiones siguen con la copia anterior;
+# - un id que el catálogo no da por activo se comprueba en el primario
+#   antes de rechazarlo: si allí sí lo está (creado o reactivado en otro
+#   worker), el catálogo se recarga;
+# - `version` es un hash del contenido: igual en todos los workers que
+#   tengan los mismos datos, así sirve como ETag de GET /api/categories.
+
+class CategoryCatalog:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (categorías por id, versión, instante de carga); se sustituye entero
+        self._state: tuple[dict[int, CategoryResponse], str, float] | None = None
+        # Sube en cada invalidación: una carga que empezó antes no se instala
+        self._generation = 0
+        # Una sola carga a la vez (al caducar, todas las peticiones lo verían)
+        self._load_lock = threading.Lock()
+
+    def load(self, db: Session) -> tuple[dict[int, CategoryResponse], str]:
+        generation = self._generation
+        # Del primario aunque sea una sesión de lectura: tras una
+        # invalidación, la réplica puede no tener aún el cambio
+        with use_primary(db):
+            categories = {
+                category.id_category: CategoryResponse.model_validate(category)
+                for category in db.scalars(select(Category).order_by(Category.id_category))
+            }
+        digest = hashlib.sha1()
+        for category in categories.values():
+            digest.update(category.model_dump_json().encode())
+        state = (categories, digest.hexdigest()[:16], time.monotonic())
+        with self._lock:
+            if generation == self._generation:
+                self._state = state
+        return state[0], state[1]
+
+    def _fresh(self, state) -> bool:
+        return state is not None and time.monotonic() - state[2] <= self.ttl
+
+    def _acquire_load(self, wait: bool) -> bool:
+        # En modo async la carga en curso corre en el mismo event loop: se
+        # cede en lugar de bloquear el hilo
+        if not wait or not in_greenlet():
+            return self._load_lock.acquire(blocking=wait)
+        while not self._load_lock.acquire(blocking=False):
+            await_only(asyncio.sleep(0.005))
+        return True
+
+    def _current(self, db: Session) -> tuple[dict[int, CategoryResponse], str]:
+        state = self._state
+        if self._fresh(state):
+            return state[0], state[1]
+        # Caducado: carga una sola petición; el resto sirve la copia anterior
+        # y solo espera si no hay ninguna
+        if not self._acquire_load(wait=state is None):
+            return state[0], state[1]
+        try:
+            state = self._state
+            if self._fresh(state):
+                return state[0], state[1]
+            return self.load(db)
+        finally:
+            self._load_lock.release()
+
+    def refresh(self, db: Session) -> tuple[dict[int, CategoryResponse], str]:
+        """Recarga del primario (una sola carga a la vez)"""
+        self._acquire_load(wait=True)
+        try:
+            return self.load(db)
+        finally:
+            self._load_lock.release()
+
+    def _refresh_if_active(self, db: Session, ids: set[int]) -> bool:
+        """
+        Ids que el catálogo no da por activos: si alguno lo está en el
+        primario, el catálogo está desfasado y se recarga (True)
+        """
+        if not ids:
+            return False
+        with use_primary(db):
+            found = db.scalars(
+                select(Category.id_category)
+                .where(Category.id_category.in_(ids), Category.is_active == True)
+                .limit(1)
+            ).first()
+        if found is None:
+            return False
+        self.refresh(db)
+        return True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._state = None
+
+    def version(self, db: Session) -> str:
+        return self._current(db)[1]
+
+    def all(self, db: Session) -> list[CategoryResponse]:
+        """Todas las categorías (activas e inactivas) ordenadas por id"""
+        return list(self._current(db)[0].values())
+
+    def get(self, db: Session, id_category: int) -> CategoryResponse | None:
+        return self._current(db)[0].get(id_category)
+
+    def is_active(self, db: Session, id_category: int) -> bool:
+        category = self.get(db, id_category)
+        if category is not None and category.is_active:
+            return True
+        if not self._refresh_if_active(db, {id_category}):
+            return False
+        category = self.get(db, id_category)
+        return category is not None and category.is_active
+
+    def active_ids(self, db: Session, wanted: set[int] = frozenset()) -> set[int]:
+        """Ids activos; los de `wanted` que falten se comprueban en el primario"""
+        active = {c.id_category for c in self._current(db)[0].values() if c.is_active}
+        if self._refresh_if_active(db, set(wanted) - active):
+            active = {c.id_category for c in self._current(db)[0].values() if c.is_active}
+        return active
+
+
+catalog = CategoryCatalog(ttl=settings.category_catalog_ttl_seconds)
+
+
+def load_category_catalog() -> None:
+    """Carga inicial (arranque de la aplicación)"""
+    with SessionLocal() as db:
+        catalog.load(db)
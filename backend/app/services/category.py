@@ -4,7 +4,15 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.models import User, Category
-from app.schemas import CategoryCreate, CategoryUpdate, CategoryList
+from app.schemas import CategoryCreate, CategoryUpdate, CategoryResponse, CategoryList
+from app.utils.pagination import TotalModeEnum
+from app.services import audit
+from app.services.catalog import catalog
+
+
+def _include_inactive(current_user: User, include_inactive: bool) -> bool:
+    """Solo admins ven inactivas"""
+    return include_inactive and current_user.role.value == "admin"
 
 
 def get_all(
@@ -12,26 +20,41 @@ def get_all(
     current_user: User,
     skip: int = 0,
     limit: int = 100,
-    include_inactive: bool = False
+    include_inactive: bool = False,
+    total_mode: TotalModeEnum = TotalModeEnum.exact
 ) -> CategoryList:
-    """Lista todas las categorías"""
-    
-    query = db.query(Category)
-    
-    # Solo admins ven inactivas
-    if not include_inactive or current_user.role.value != "admin":
-        query = query.filter(Category.is_active == True)
+    """Lista todas las categorías (desde el catálogo en memoria)"""
     
-    total = query.count()
-    categories = query.offset(skip).limit(limit).all()
+    include_inactive = _include_inactive(current_user, include_inactive)
+    categories = [c for c in catalog.all(db) if include_inactive or c.is_active]
     
-    return CategoryList(categories=categories, total=total)
+    return CategoryList(
+        categories=categories[skip:skip + limit],
+        total=None if total_mode == TotalModeEnum.none else len(categories)
+    )
+
+
+def list_version(
+    db: Session,
+    current_user: User,
+    skip: int = 0,
+    limit: int = 100,
+    include_inactive: bool = False,
+    total_mode: TotalModeEnum = TotalModeEnum.exact
+) -> str:
+    """
+    Versión de la respuesta de get_all (ETag de GET /api/categories): la del
+    catálogo más cada parámetro que cambia el cuerpo, con include_inactive
+    ya resuelto por rol.
+    """
+    include_inactive = _include_inactive(current_user, include_inactive)
+    return f"{catalog.version(db)}-{int(include_inactive)}-{total_mode.value}-{skip}-{limit}"
 
 
-def get_by_id(db: Session, category_id: int, current_user: User) -> Category:
+def get_by_id(db: Session, category_id: int, current_user: User) -> CategoryResponse:
     """Obtiene una categoría por ID"""
     
-    category = db.query(Category).filter(Category.id_category == category_id).first()
+    category = catalog.get(db, category_id)
     
     if not category:
         raise HTTPException(
@@ -49,7 +72,7 @@ def get_by_id(db: Session, category_id: int, current_user: User) -> Category:
     return category
 
 
-def create(db: Session, request: CategoryCreate) -> Category:
+def create(db: Session, request: CategoryCreate, current_user: User) -> Category:
     """Crea una nueva categoría"""
     
     # Verificar nombre único
@@ -64,11 +87,13 @@ def create(db: Session, request: CategoryCreate) -> Category:
     db.add(new_category)
     db.commit()
     db.refresh(new_category)
+    catalog.invalidate()
+    audit.record_changes("category", new_category.id_category, "create", current_user.id_user)
     
     return new_category
 
 
-def update(db: Session, category_id: int, request: CategoryUpdate) -> Category:
+def update(db: Session, category_id: int, request: CategoryUpdate, current_user: User) -> Category:
     """Actualiza una categoría"""
     
     category = db.query(Category).filter(Category.id_category == category_id).first()
@@ -89,16 +114,19 @@ def update(db: Session, category_id: int, request: CategoryUpdate) -> Category:
     
     # Actualizar
     update_data = request.model_dump(exclude_unset=True)
+    previous = {field: getattr(category, field) for field in update_data}
     for field, value in update_data.items():
         setattr(category, field, value)
     
     db.commit()
     db.refresh(category)
+    catalog.invalidate()
+    audit.record_changes("category", category_id, "update", current_user.id_user, previous, update_data)
     
     return category
 
 
-def delete(db: Session, category_id: int, hard_delete: bool = False) -> None:
+def delete(db: Session, category_id: int, current_user: User, hard_delete: bool = False) -> None:
     """Elimina una categoría"""
     
     category = db.query(Category).filter(Category.id_category == category_id).first()
@@ -109,9 +137,19 @@ def delete(db: Session, category_id: int, hard_delete: bool = False) -> None:
             detail="Categoría no encontrada"
         )
     
+    was_active = category.is_active
     if hard_delete:
         db.delete(category)
     else:
         category.is_active = False
     
-    db.commit()
\ No newline at end of file
+    db.commit()
+    catalog.invalidate()
+    
+    if hard_delete:
+        audit.record_changes("category", category_id, "delete", current_user.id_user)
+    else:
+        audit.record_changes(
+            "category", category_id, "delete", current_user.id_user,
+            {"is_active": was_active}, {"is_active": False}
+        )
\ No newline at end of file
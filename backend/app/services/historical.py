@@ -0,0 +1,101 @@
+# app/services/historical.py
+
+from datetime import date, datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models import User, Historical
+from app.schemas import HistoricalList
+from app.services import activity as activity_service
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+# ============================================
+# KEYSET PAGINATION
+# ============================================
+# Orden: created_at DESC, id_historical DESC (más recientes primero). La
+# línea de tiempo de una entidad la resuelve ix_historical_entity_timeline
+# (entity, entity_id, created_at, id_historical) sin ordenar en memoria.
+
+def _order_by() -> tuple:
+    return Historical.created_at.desc(), Historical.id_historical.desc()
+
+
+def _seek_before(cursor: str):
+    """Predicado 'fila anterior al cursor' (comparación de tuplas, usa el índice)"""
+    raw_created_at, raw_id = decode_cursor(cursor, 2)
+    try:
+        created_at = datetime.fromisoformat(raw_created_at)
+        id_historical = int(raw_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    return tuple_(Historical.created_at, Historical.id_historical) < (created_at, id_historical)
+
+
+def _page(db: Session, conditions: list, limit: int, cursor: str | None) -> HistoricalList:
+    if cursor:
+        conditions = [*conditions, _seek_before(cursor)]
+
+    records = db.scalars(
+        select(Historical).where(*conditions).order_by(*_order_by()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor([records[-1].created_at, records[-1].id_historical])
+
+    return HistoricalList(records=records, next_cursor=next_cursor)
+
+
+def get_activity_history(
+    db: Session,
+    activity_id: int,
+    current_user: User,
+    limit: int = 50,
+    cursor: str | None = None
+) -> HistoricalList:
+    """Historial de una actividad (mismos permisos que verla)"""
+
+    activity_service.get_by_id(db, activity_id, current_user)
+
+    return _page(db, [
+        Historical.entity == "activity",
+        Historical.entity_id == activity_id,
+    ], limit, cursor)
+
+
+def get_all(
+    db: Session,
+    entity: str | None = None,
+    entity_id: int | None = None,
+    id_user: int | None = None,
+    action: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 50,
+    cursor: str | None = None
+) -> HistoricalList:
+    """Auditoría completa con filtros (solo admin)"""
+
+    conditions = []
+    if entity:
+        conditions.append(Historical.entity == entity)
+    if entity_id is not None:
+        conditions.append(Historical.entity_id == entity_id)
+    if id_user is not None:
+        conditions.append(Historical.id_user == id_user)
+    if action:
+        conditions.append(Historical.action == action)
+    # Rango por días completos; en PostgreSQL descarta particiones enteras
+    if date_from:
+        conditions.append(Historical.created_at >= date_from)
+    if date_to:
+        conditions.append(Historical.created_at < date_to + timedelta(days=1))
+
+    return _page(db, conditions, limit, cursor)
@@ -0,0 +1,216 @@
+# app/services/importer.py
+
+import csv
+import enum
+import io
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import User, Activity
+from app.models.activity import ActivityStateEnum, PriorityEnum
+from app.schemas import ActivityCreate, ActivityImportError, ActivityImportResult
+from app.schemas.activity import MAX_IMPORT_ERRORS
+from app.services import audit, stats
+from app.services.catalog import catalog
+from app.services.stats import ActivityRow
+
+
+# ============================================
+# IMPORTACIÓN CSV DE ACTIVIDADES
+# ============================================
+# El CSV se lee fila a fila (nunca entero en memoria). Cada fila se valida
+# con ActivityCreate; la categoría se indica por nombre (`category`) o por
+# id (`id_category`) y se resuelve contra el catálogo en memoria. Las filas
+# válidas se insertan por lotes de import_batch_size, un commit por lote:
+#
+# - PostgreSQL: COPY ... FROM STDIN (psycopg2 copy_expert), con los ids
+#   reservados antes de la secuencia para poder auditar las altas;
+# - resto: INSERT executemany (insertmanyvalues) con RETURNING del id.
+#
+# Una fila inválida no aborta su lote: se informa con su número de línea.
+# Las actividades quedan asignadas a quien importa, como en POST.
+
+COLUMNS = ("title", "description", "priority", "due_date", "category", "id_category")
+
+# Columnas del INSERT/COPY; created_at, updated_at y version salen de los
+# valores por defecto del servidor
+INSERT_COLUMNS = (
+    "id_activity", "title", "description", "priority", "due_date",
+    "id_category", "id_user", "created_by", "state", "is_active",
+)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'fila'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _decoded_lines(stream: BinaryIO) -> Iterator[str]:
+    """Decodifica línea a línea: un byte inválido se detecta en su línea"""
+    for number, raw in enumerate(stream):
+        yield raw.decode("utf-8-sig" if number == 0 else "utf-8")
+
+
+def _read_rows(stream: BinaryIO) -> Iterator[tuple[int, dict]]:
+    """(línea, fila) con cabeceras en minúsculas; las celdas vacías se omiten"""
+    reader = csv.DictReader(_decoded_lines(stream))
+    if not reader.fieldnames:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El CSV está vacío")
+    reader.fieldnames = [(name or "").strip().lower() for name in reader.fieldnames]
+    if "title" not in reader.fieldnames:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Falta la columna 'title'. Columnas admitidas: {', '.join(COLUMNS)}"
+        )
+
+    for row in reader:
+        yield reader.line_num, {
+            key: value.strip() for key, value in row.items()
+            if key in COLUMNS and isinstance(value, str) and value.strip()
+        }
+
+
+class _Importer:
+    def __init__(self, db: Session, current_user: User):
+        self.db = db
+        self.current_user = current_user
+        dialect = db.get_bind().dialect
+        self.copy = dialect.name == "postgresql"
+        # copy_expert va por el cursor DBAPI: sus errores (psycopg2.Error)
+        # no pasan por SQLAlchemy y no son SQLAlchemyError
+        self.dbapi_error = dialect.loaded_dbapi.Error
+        # Recarga del primario: las categorías se buscan también por nombre,
+        # y una creada en otro worker aún no estaría en este catálogo
+        categories, _ = catalog.refresh(db)
+        self.categories_by_name = {
+            c.name.casefold(): c.id_category for c in categories.values() if c.is_active
+        }
+        self.active_categories = set(self.categories_by_name.values())
+        self.created = 0
+        self.failed = 0
+        self.errors: list[ActivityImportError] = []
+
+    def reject(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(ActivityImportError(line=line, error=error))
+
+    def parse(self, line: int, row: dict) -> dict | None:
+        """Fila lista para insertar, o None si se rechaza"""
+        category = row.pop("category", None)
+        if category is not None:
+            row["id_category"] = self.categories_by_name.get(category.casefold())
+            if row["id_category"] is None:
+                self.reject(line, f"Categoría '{category}' no encontrada o inactiva")
+                return None
+
+        try:
+            activity = ActivityCreate.model_validate(row)
+        except ValidationError as e:
+            self.reject(line, _validation_message(e))
+            return None
+
+        if activity.id_category and activity.id_category not in self.active_categories:
+            self.reject(line, "Categoría no encontrada o inactiva")
+            return None
+
+        return {
+            **activity.model_dump(),
+            "id_user": self.current_user.id_user,
+            "created_by": self.current_user.id_user,
+            "state": ActivityStateEnum.pendiente,
+            "is_active": True,
+        }
+
+    def _copy(self, rows: list[dict]) -> list[int]:
+        ids = self.db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('activity', 'id_activity')) FROM generate_series(1, :n)"),
+            {"n": len(rows)}
+        ).scalars().all()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for id_activity, row in zip(ids, rows):
+            row["id_activity"] = id_activity
+            writer.writerow([
+                value.value if isinstance(value, enum.Enum) else value
+                for value in (row[column] for column in INSERT_COLUMNS)
+            ])
+        buffer.seek(0)
+
+        # La conexión DBAPI de la sesión: el COPY va en la misma transacción
+        cursor = self.db.connection().connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY activity ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        return ids
+
+    def _executemany(self, rows: list[dict]) -> list[int]:
+        return self.db.scalars(insert(Activity).returning(Activity.id_activity), rows).all()
+
+    def flush(self, rows: list[dict], lines: list[int]) -> None:
+        """Inserta un lote y lo confirma; si la base de datos lo rechaza, se informa por fila"""
+        if not rows:
+            return
+        try:
+            ids = self._copy(rows) if self.copy else self._executemany(rows)
+            audit.write_created(self.db, "activity", ids, self.current_user.id_user)
+            self.db.commit()
+        except (SQLAlchemyError, self.dbapi_error) as e:
+            self.db.rollback()
+            message = f"Lote rechazado por la base de datos: {type(getattr(e, 'orig', e)).__name__}"
+            for line in lines:
+                self.reject(line, message)
+            return
+
+        self.created += len(rows)
+        for row in rows:
+            stats.activity_changed(None, ActivityRow(
+                state=row["state"], priority=PriorityEnum(row["priority"]), id_category=row["id_category"],
+                due_date=row["due_date"], id_user=row["id_user"],
+                created_by=row["created_by"], is_active=True,
+            ))
+
+
+def import_csv(stream: BinaryIO, current_user: User) -> ActivityImportResult:
+    """
+    Importa actividades desde un CSV (binario, UTF-8; cabecera obligatoria).
+
+    Abre su propia sesión síncrona: COPY necesita la conexión de psycopg2,
+    también cuando las peticiones usan AsyncSession. Llamar desde el
+    threadpool.
+    """
+    with SessionLocal() as db:
+        importer = _Importer(db, current_user)
+        rows, lines = [], []
+        line = 1
+        try:
+            for line, raw in _read_rows(stream):
+                row = importer.parse(line, raw)
+                if row is None:
+                    continue
+                rows.append(row)
+                lines.append(line)
+                if len(rows) >= settings.import_batch_size:
+                    importer.flush(rows, lines)
+                    rows, lines = [], []
+        except UnicodeDecodeError:
+            importer.reject(line + 1, "El fichero no es UTF-8 válido; se detuvo la importación")
+        except csv.Error as e:
+            importer.reject(line + 1, f"CSV mal formado ({e}); se detuvo la importación")
+        importer.flush(rows, lines)
+
+    return ActivityImportResult(created=importer.created, failed=importer.failed, errors=importer.errors)
@@ -0,0 +1,342 @@
+# app/services/stats.py
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import select, func, or_, event
+from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from app.config import settings
+from app.database import SessionLocal, use_primary
+from app.models import User, Activity
+from app.models.activity import ActivityStateEnum, PriorityEnum
+from app.schemas import ActivityStats, CategoryCount
+
+logger = logging.getLogger("app.stats")
+
+
+# ============================================
+# ESTADÍSTICAS DEL DASHBOARD (CONTADORES INCREMENTALES)
+# ============================================
+# Por ámbito (None = global para admins; id_user = lo que ve ese operador)
+# se guardan "celdas": cuántas actividades activas hay por
+# (state, priority, id_category, due_date). Todas las cifras del dashboard
+# salen de sumar celdas, así que nunca se hace GROUP BY por petición:
+#
+# - la primera lectura de un ámbito hace un GROUP BY sobre ese ámbito;
+# - create/update/change_state/delete aplican el delta (fila antes/después);
+# - un hilo recalcula cada stats_reconcile_seconds los ámbitos leídos desde
+#   la pasada anterior y olvida los demás.
+#
+# Los contadores son de cada proceso: con varios workers, una escritura
+# hecha en otro worker se ve aquí tras la siguiente reconciliación.
+#
+# Carga frente a deltas: el delta de una escritura llega después de su
+# commit, así que puede llegar después de guardar un GROUP BY que ya la
+# contaba. Cada commit recibe un número de secuencia antes de ejecutarse
+# (before_commit) y queda "en curso" hasta after_commit/rollback. Una carga
+# toma su número, espera a que terminen los commits en curso con número
+# menor (ya confirmados antes de su SELECT) y entonces lee: un delta con
+# número menor ya está en la carga y se descarta; los que llegan mientras
+# la carga corre se guardan y se aplican (o descartan) al guardarla.
+#
+# Queda una ventana: un commit que empieza después del número de la carga
+# y se confirma antes de que su SELECT tome la instantánea cuenta dos
+# veces. Es el tiempo de lanzar la sentencia; la reconciliación lo corrige.
+
+COMMIT_WAIT_SECONDS = 5.0
+
+_commit_seq = itertools.count(1)
+_commits = threading.Condition()
+_in_flight: set[int] = set()
+_last_commit_var: ContextVar[int | None] = ContextVar("stats_last_commit", default=None)
+
+
+def _begin_commit(session: Session) -> None:
+    seq = next(_commit_seq)
+    session.info["stats_commit"] = seq
+    with _commits:
+        _in_flight.add(seq)
+
+
+def _end_commit(session: Session) -> int | None:
+    seq = session.info.pop("stats_commit", None)
+    if seq is not None:
+        with _commits:
+            _in_flight.discard(seq)
+            _commits.notify_all()
+    return seq
+
+
+def _stamp_commit(session: Session) -> None:
+    seq = _end_commit(session)
+    if seq is not None:
+        _last_commit_var.set(seq)
+
+
+event.listen(Session, "before_commit", _begin_commit)
+event.listen(Session, "after_commit", _stamp_commit)
+event.listen(Session, "after_rollback", _end_commit)
+event.listen(Session, "after_soft_rollback", lambda session, previous_transaction: _end_commit(session))
+
+
+def _commits_pending(before: int) -> bool:
+    with _commits:
+        return any(seq < before for seq in _in_flight)
+
+
+def _wait_for_commits(before: int) -> None:
+    """
+    Espera a que terminen los commits en curso numerados antes de `before`.
+    En modo async se cede el event loop: esos commits corren en él.
+    """
+    deadline = time.monotonic() + COMMIT_WAIT_SECONDS
+    if in_greenlet():
+        while _commits_pending(before) and time.monotonic() < deadline:
+            await_only(asyncio.sleep(0.001))
+    else:
+        with _commits:
+            _commits.wait_for(
+                lambda: not any(seq < before for seq in _in_flight),
+                timeout=COMMIT_WAIT_SECONDS
+            )
+    if _commits_pending(before):
+        logger.warning("carga de estadísticas sin esperar a todos los commits en curso")
+
+
+GLOBAL = None
+FINISHED = {ActivityStateEnum.completada, ActivityStateEnum.cancelada}
+
+
+class ActivityRow(NamedTuple):
+    """Lo que necesitan los contadores de una actividad"""
+    state: ActivityStateEnum
+    priority: PriorityEnum
+    id_category: int | None
+    due_date: date | None
+    id_user: int | None
+    created_by: int
+    is_active: bool
+
+    @classmethod
+    def of(cls, activity: Activity, **overrides) -> "ActivityRow":
+        """Fila de `activity`; `overrides` permite reconstruir su estado previo"""
+        values = {field: getattr(activity, field) for field in cls._fields}
+        values.update((k, v) for k, v in overrides.items() if k in cls._fields)
+        values["state"] = ActivityStateEnum(values["state"])
+        values["priority"] = PriorityEnum(values["priority"])
+        return cls(**values)
+
+    def cell(self) -> tuple:
+        return self.state, self.priority, self.id_category, self.due_date
+
+    def scopes(self) -> set:
+        # GLOBAL es None: una actividad sin asignar no añade ámbito extra
+        return {GLOBAL, self.id_user, self.created_by}
+
+
+class StatsStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cells: dict[int | None, Counter] = {}
+        # Número de secuencia tomado antes del SELECT de la carga vigente
+        self._loaded_at: dict[int | None, int] = {}
+        # Cargas en curso: ámbito → (secuencia, deltas recibidos mientras)
+        self._loading: dict[int | None, tuple[int, list]] = {}
+        self._read: set = set()
+
+    def _load(self, db: Session, scope) -> Counter:
+        """GROUP BY de un ámbito"""
+        query = (
+            select(Activity.state, Activity.priority, Activity.id_category, Activity.due_date, func.count())
+            .where(Activity.is_active == True)
+            .group_by(Activity.state, Activity.priority, Activity.id_category, Activity.due_date)
+        )
+        if scope is not GLOBAL:
+            query = query.where(or_(Activity.id_user == scope, Activity.created_by == scope))
+
+        # Del primario aunque llegue una sesión de lectura: los deltas
+        # anteriores a la carga se descartan, así que una réplica retrasada
+        # perdería esas escrituras hasta la siguiente reconciliación
+        with use_primary(db):
+            return Counter({
+                (ActivityStateEnum(state), PriorityEnum(priority), id_category, due_date): count
+                for state, priority, id_category, due_date, count in db.execute(query)
+            })
+
+    def _begin_load(self, scope) -> int | None:
+        """Secuencia de la carga, o None si ya hay otra en curso (no se guardará)"""
+        with self._lock:
+            if scope in self._loading:
+                return None
+            started = next(_commit_seq)
+            self._loading[scope] = (started, [])
+        try:
+            _wait_for_commits(started)
+        except BaseException:
+            self._abort_load(scope)
+            raise
+        return started
+
+    def _store(self, scope, started: int, cells: Counter) -> Counter:
+        """Guarda la carga con los deltas confirmados después de su SELECT"""
+        with self._lock:
+            _, pending = self._loading.pop(scope)
+            for seq, cell, sign in pending:
+                if seq > started:
+                    cells[cell] += sign
+            self._cells[scope] = cells
+            self._loaded_at[scope] = started
+            return cells.copy()
+
+    def _abort_load(self, scope) -> None:
+        with self._lock:
+            self._loading.pop(scope, None)
+
+    def _load_and_store(self, db: Session, scope) -> Counter | None:
+        started = self._begin_load(scope)
+        if started is None:
+            return None
+        try:
+            cells = self._load(db, scope)
+        except BaseException:
+            self._abort_load(scope)
+            raise
+        return self._store(scope, started, cells)
+
+    def cells(self, db: Session, scope) -> Counter:
+        with self._lock:
+            self._read.add(scope)
+            cells = self._cells.get(scope)
+            if cells is not None:
+                return cells.copy()
+
+        cells = self._load_and_store(db, scope)
+        # Otra petición ya está cargando el ámbito: se responde con esta
+        # lectura sin guardarla
+        return cells if cells is not None else self._load(db, scope)
+
+    def apply(self, before: ActivityRow | None, after: ActivityRow | None) -> None:
+        """Delta de una escritura; solo toca ámbitos cargados o cargándose"""
+        # Sin commit previo en este contexto (llamada directa): cuenta como
+        # posterior a cualquier carga
+        seq = _last_commit_var.get() or next(_commit_seq)
+        with self._lock:
+            for row, sign in ((before, -1), (after, 1)):
+                if row is None or not row.is_active:
+                    continue
+                for scope in row.scopes():
+                    loading = self._loading.get(scope)
+                    if loading is not None:
+                        loading[1].append((seq, row.cell(), sign))
+                    cells = self._cells.get(scope)
+                    if cells is not None and seq > self._loaded_at[scope]:
+                        cells[row.cell()] += sign
+
+    def reconcile(self) -> None:
+        """Recalcula los ámbitos leídos desde la pasada anterior; olvida el resto"""
+        with self._lock:
+            active, self._read = self._read, set()
+            for scope in list(self._cells):
+                if scope not in active:
+                    del self._cells[scope]
+                    del self._loaded_at[scope]
+
+        with SessionLocal() as db:
+            for scope in active:
+                self._load_and_store(db, scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._loaded_at.clear()
+            self._read.clear()
+
+
+store = StatsStore()
+
+
+def activity_changed(before: ActivityRow | None, after: ActivityRow | None) -> None:
+    """Llamar tras el commit de cualquier escritura sobre una actividad"""
+    store.apply(before, after)
+
+
+def get(db: Session, current_user: User) -> ActivityStats:
+    """Totales del dashboard: globales para admin, propios para operadores"""
+
+    scope = GLOBAL if current_user.role.value == "admin" else current_user.id_user
+    cells = store.cells(db, scope)
+
+    today = date.today()
+    week_end = today + timedelta(days=6 - today.weekday())
+
+    by_state, by_priority, by_category = Counter(), Counter(), Counter()
+    overdue = due_this_week = 0
+    for (state, priority, id_category, due_date), count in cells.items():
+        if count <= 0:
+            continue
+        by_state[state.value] += count
+        by_priority[priority.value] += count
+        by_category[id_category] += count
+        if due_date is not None and state not in FINISHED:
+            if due_date < today:
+                overdue += count
+            elif due_date <= week_end:
+                due_this_week += count
+
+    return ActivityStats(
+        total=sum(by_state.values()),
+        by_state={state.value: by_state[state.value] for state in ActivityStateEnum},
+        by_priority={priority.value: by_priority[priority.value] for priority in PriorityEnum},
+        by_category=[
+            CategoryCount(id_category=id_category, count=count)
+            for id_category, count in sorted(by_category.items(), key=lambda item: -item[1])
+        ],
+        overdue=overdue,
+        due_this_week=due_this_week,
+    )
+
+
+# ============================================
+# RECONCILIACIÓN PERIÓDICA
+# ============================================
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _reconcile_loop() -> None:
+    while not _stop.wait(settings.stats_reconcile_seconds):
+        started = time.perf_counter()
+        try:
+            store.reconcile()
+        except Exception:
+            logger.exception("fallo al reconciliar estadísticas")
+        else:
+            logger.debug("estadísticas reconciliadas", extra={"fields": {
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }})
+
+
+def start_stats_reconciler() -> None:
+    global _thread
+    if _thread is None:
+        _stop.clear()
+        _thread = threading.Thread(target=_reconcile_loop, name="stats-reconciler", daemon=True)
+        _thread.start()
+
+
+def stop_stats_reconciler() -> None:
+    global _thread
+    if _thread is not None:
+        _stop.set()
+        _thread.join()
+        _thread = None
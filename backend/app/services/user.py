@@ -1,28 +1,35 @@
-from app.schemas import UserList, UserUpdate, UserChangePassword
+from app.schemas import UserList, UserResponse, UserUpdate, UserChangePassword
 from app.models import User
 from sqlalchemy.orm import Session
-from app.utils import verify_password, hash_password, get_current_user, get_current_admin
+from app.utils import verify_password, hash_password, get_current_user, get_current_admin, invalidate_user
 from fastapi import HTTPException, status
+from app.utils.pagination import TotalModeEnum, count_cache_key, fetch_page, as_dicts
+from app.services import audit
+
+# Lectura sin ORM: solo las columnas de UserResponse (nunca el hash de la
+# contraseña), como filas Row en lugar de instancias User
+READ_COLUMNS = [getattr(User, name) for name in UserResponse.model_fields]
 
 def get_all(
     db: Session,
     current_user: User,
     skip: int = 0,
     limit: int = 20,
-    include_inactive: bool = False
+    include_inactive: bool = False,
+    total_mode: TotalModeEnum = TotalModeEnum.exact
 ) -> UserList:
     """Lista todos los usuarios"""
     
-    query = db.query(User)
+    query = db.query(*READ_COLUMNS)
     
     if not include_inactive:
         query = query.filter(User.is_active == True)
     
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
+    cache_key = count_cache_key("user", include_inactive=include_inactive)
+    users, total = fetch_page(db, query, skip, limit, total_mode, cache_key)
     
     return UserList(
-        users=users,
+        users=as_dicts(users),
         total=total,
         page=(skip // limit) + 1,
         per_page=limit
@@ -48,10 +55,7 @@ def update(
     request: UserUpdate,
     current_user: User
 ) -> User:
-    if current_user.id != user_id and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="No tienes permiso para editar este usuario")
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).filter(User.id_user == user_id).first()
     
     if current_user.role.value != "admin":
         if current_user.id_user != user_id:
@@ -85,11 +89,14 @@ def update(
             )
 
     update_data = request.model_dump(exclude_unset=True)
+    previous = {field: getattr(user, field) for field in update_data}
     for field, value in update_data.items():
         setattr(user, field, value)
     
     db.commit()
     db.refresh(user)
+    invalidate_user(user_id)
+    audit.record_changes("user", user_id, "update", current_user.id_user, previous, update_data)
     
     return user
 
@@ -126,6 +133,9 @@ def change_password(
     
     db.commit()
     db.refresh(user)
+    invalidate_user(user_id)
+    # Solo consta el cambio, nunca los hashes
+    audit.record_changes("user", user_id, "change_password", current_user.id_user)
     
     return user
 
@@ -146,9 +156,19 @@ def delete(db: Session, user_id: int, current_user: User, hard_delete: bool = Fa
             detail="Usuario no encontrado"
         )
     
+    was_active = user.is_active
     if hard_delete:
         db.delete(user)
     else:
         user.is_active = False
     
-    db.commit()
\ No newline at end of file
+    db.commit()
+    invalidate_user(user_id)
+    
+    if hard_delete:
+        audit.record_changes("user", user_id, "delete", current_user.id_user)
+    else:
+        audit.record_changes(
+            "user", user_id, "delete", current_user.id_user,
+            {"is_active": was_active}, {"is_active": False}
+        )
\ No newline at end of file
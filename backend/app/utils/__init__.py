@@ -1,9 +1,16 @@
 from app.utils.security import (
     hash_password,
     verify_password,
+    needs_rehash,
+    calibrate_password_hashing,
+    bound_password_hashing,
+    shutdown_password_hashing,
     create_access_token,
     decode_token,
     get_current_user,
     get_current_admin,
     oauth2_scheme,
+    CurrentUser,
+    principal_cache,
+    invalidate_user,
 )
\ No newline at end of file
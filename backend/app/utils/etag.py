@@ -0,0 +1,33 @@
+# ============================================
+# ETAGS (If-None-Match / If-Match)
+# ============================================
+
+def make_etag(value) -> str:
+    """ETag fuerte a partir de una versión o hash: '"7"'"""
+    return f'"{value}"'
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): '*' o alguna etiqueta igual"""
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.removeprefix("W/") for tag in _tags(header))
+
+
+def if_match_value(header: str | None) -> str | None:
+    """
+    Valor esperado de If-Match sin comillas; None si no se envió o es '*'
+    (cualquier versión vale). Solo se admite una etiqueta, y fuerte: If-Match
+    exige comparación fuerte (RFC 9110 §13.1.1), así que W/"3" no coincide
+    con ninguna versión ("" → 412).
+    """
+    if not header or header.strip() == "*":
+        return None
+    tags = _tags(header)
+    if len(tags) != 1 or tags[0].startswith("W/"):
+        return ""
+    return tags[0].strip('"')
@@ -0,0 +1,108 @@
+import copy
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import settings
+
+
+# ============================================
+# LOGGING ESTRUCTURADO Y NO BLOQUEANTE
+# ============================================
+# Los loggers de la aplicación ("app.*") solo encolan el registro; un hilo
+# (QueueListener) lo formatea como JSON y lo escribe en stdout. Así una
+# petición nunca espera a que se escriba un log.
+#
+# Uso:
+#     logger = logging.getLogger("app.activities")
+#     logger.info("actividad creada", extra={"fields": {"id_activity": 7}})
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+_listener: QueueListener | None = None
+
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    Encola el registro ya resuelto en el hilo que loguea: el request id
+    (el listener no ve el contexto de la petición) y la traza, si la hay.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = request_id_var.get()
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro; `extra={"fields": {...}}` se añade tal cual"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo (log_json=False)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+def setup_logging() -> None:
+    """Configura el logger "app" con cola + hilo escritor (idempotente)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    queue_handler = _ContextQueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JsonFormatter() if settings.log_json
+        else TextFormatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.log_level.upper())
+    app_logger.handlers = [queue_handler]
+    app_logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,233 @@
+import bisect
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# ============================================
+# MÉTRICAS (FORMATO DE EXPOSICIÓN DE PROMETHEUS)
+# ============================================
+# Registro mínimo en proceso: contadores, gauges e histogramas con
+# etiquetas, y colectores que se evalúan al servir /metrics (estado del
+# pool, cachés). Cada worker expone sus propias series.
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # por serie: [conteo por bucket..., +Inf], suma
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            items = [(k, list(c), t[0]) for k, (c, t) in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels((*self.labels, "le"), (*key, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self._add(Histogram(name, description, labels, **kwargs))
+
+    def collector(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Registra una función que actualiza gauges justo antes de exponerlos"""
+        self._collectors.append(fn)
+        return fn
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# ============================================
+# HTTP
+# ============================================
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"))
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso", ("method", "route"))
+
+
+# ============================================
+# POOL DE CONEXIONES
+# ============================================
+
+POOL_SIZE = registry.gauge("db_pool_size", "Tamaño configurado del pool", ("engine",))
+POOL_CHECKED_OUT = registry.gauge("db_pool_checked_out", "Conexiones prestadas", ("engine",))
+POOL_CHECKED_IN = registry.gauge("db_pool_checked_in", "Conexiones libres en el pool", ("engine",))
+POOL_OVERFLOW = registry.gauge("db_pool_overflow", "Conexiones por encima de pool_size", ("engine",))
+POOL_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+
+_instrumented_engines: dict[str, Engine] = {}
+
+
+def _time_checkouts(pool, label: str) -> None:
+    """Envuelve la obtención de conexiones del pool para medir la espera"""
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, engine=label)
+
+    pool._do_get = timed_do_get
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Publica las estadísticas del pool de `engine` con la etiqueta `label`"""
+    _instrumented_engines[label] = engine
+    _time_checkouts(engine.pool, label)
+
+    # dispose() crea un pool nuevo: hay que volver a envolverlo
+    @event.listens_for(engine, "engine_disposed")
+    def _on_dispose(conn_engine):
+        _time_checkouts(conn_engine.pool, label)
+
+
+@registry.collector
+def _collect_pool_stats() -> None:
+    for label, engine in _instrumented_engines.items():
+        pool = engine.pool
+        for gauge, attribute in (
+            (POOL_SIZE, "size"),
+            (POOL_CHECKED_OUT, "checkedout"),
+            (POOL_CHECKED_IN, "checkedin"),
+        ):
+            # No todos los pools (p. ej. SQLite en memoria) tienen todas
+            if hasattr(pool, attribute):
+                gauge.set(getattr(pool, attribute)(), engine=label)
+        if hasattr(pool, "overflow"):
+            # QueuePool.overflow() empieza en -pool_size mientras el pool se llena
+            POOL_OVERFLOW.set(max(pool.overflow(), 0), engine=label)
+
+
+# ============================================
+# CACHÉS EN PROCESO
+# ============================================
+
+CACHE_HITS = registry.gauge("app_cache_hits", "Aciertos acumulados de la caché", ("cache",))
+CACHE_MISSES = registry.gauge("app_cache_misses", "Fallos acumulados de la caché", ("cache",))
+CACHE_ENTRIES = registry.gauge("app_cache_entries", "Entradas en la caché", ("cache",))
+
+_watched_caches: dict = {}
+
+
+def watch_cache(label: str, cache) -> None:
+    """Publica hits/misses/tamaño de un TTLCache"""
+    _watched_caches[label] = cache
+
+
+@registry.collector
+def _collect_cache_stats() -> None:
+    for label, cache in _watched_caches.items():
+        stats = cache.stats()
+        CACHE_HITS.set(stats["hits"], cache=label)
+        CACHE_MISSES.set(stats["misses"], cache=label)
+        CACHE_ENTRIES.set(stats["size"], cache=label)
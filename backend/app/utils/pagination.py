@@ -0,0 +1,145 @@
+import base64
+import enum
+import json
+from datetime import date
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session, Query
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+
+# ============================================
+# CURSORES OPACOS (KEYSET PAGINATION)
+# ============================================
+# El cursor es la clave de ordenación de la última fila entregada,
+# serializada como JSON y codificada en base64 url-safe. El cliente
+# no debe interpretarlo: solo devolverlo en la siguiente petición.
+
+def encode_cursor(values: list) -> str:
+    """Codifica la clave de ordenación de una fila como cursor opaco"""
+    payload = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodifica un cursor; lanza 400 si está corrupto"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+    return values
+
+
+# ============================================
+# TOTALES: EXACTO, ESTIMADO O NINGUNO
+# ============================================
+
+class TotalModeEnum(str, enum.Enum):
+    exact = "exact"          # COUNT(*) OVER () en la misma consulta
+    estimated = "estimated"  # caché con TTL o estimación del planificador
+    none = "none"            # sin total
+
+
+count_cache = TTLCache(maxsize=settings.count_cache_size, ttl=settings.count_cache_ttl_seconds)
+
+
+def count_cache_key(entity: str, **filters) -> tuple:
+    """Clave normalizada: ignora filtros vacíos y el orden de los argumentos"""
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if value is None or value is False or value == "":
+            continue
+        if isinstance(value, enum.Enum):
+            value = value.value
+        elif isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, str):
+            value = " ".join(value.lower().split())
+        normalized.append((name, value))
+    return (entity, tuple(normalized))
+
+
+def _planner_estimate(db: Session, query: Query) -> int:
+    """Filas estimadas por el planificador de PostgreSQL (sin ejecutar la consulta)"""
+    bind = db.get_bind()
+    compiled = query.order_by(None).statement.compile(
+        dialect=bind.dialect,
+        compile_kwargs={"render_postcompile": True}
+    )
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_total(db: Session, query: Query, cache_key: tuple) -> int:
+    """Total aproximado: caché por filtros; si falla, planificador (PG) o COUNT"""
+    total = count_cache.get(cache_key)
+    if total is None:
+        if db.get_bind().dialect.name == "postgresql":
+            total = _planner_estimate(db, query)
+        else:
+            total = query.order_by(None).count()
+        count_cache.set(cache_key, total)
+    return total
+
+
+def fetch_page(
+    db: Session,
+    query: Query,
+    skip: int,
+    limit: int,
+    total_mode: TotalModeEnum,
+    cache_key: tuple,
+    count_query: Query | None = None
+) -> tuple[list, int | None]:
+    """
+    Ejecuta la página y calcula el total según `total_mode`.
+
+    `count_query` es la consulta sin predicados de keyset; si se pasa, el
+    total exacto no puede salir de la ventana y se cuenta por separado.
+    """
+    if total_mode == TotalModeEnum.exact and count_query is None:
+        rows = query.add_columns(func.count().over()).offset(skip).limit(limit).all()
+        if rows:
+            # Query de una entidad: (entidad, total). Query de columnas: la
+            # fila entera; el total sobra como atributo extra
+            if len(query.column_descriptions) == 1:
+                return [row[0] for row in rows], rows[0][1]
+            return rows, rows[0][-1]
+        # Página vacía: la ventana no devuelve nada, solo hay que contar si
+        # se pidió una página posterior a la primera
+        return [], query.order_by(None).count() if skip else 0
+
+    items = query.offset(skip).limit(limit).all()
+    base = count_query if count_query is not None else query
+
+    if total_mode == TotalModeEnum.exact:
+        return items, base.order_by(None).count()
+    if total_mode == TotalModeEnum.estimated:
+        return items, estimate_total(db, base, cache_key)
+    return items, None
+
+
+def as_dicts(rows: list) -> list[dict]:
+    """
+    Filas Row (consultas de columnas) como dicts para el modelo de respuesta:
+    pydantic valida un dict bastante más rápido que leyendo atributos de Row
+    con from_attributes. Las columnas sobrantes (el total) se ignoran.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
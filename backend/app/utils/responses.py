@@ -0,0 +1,20 @@
+# ============================================
+# RESPUESTAS JSON DE MODELOS YA VALIDADOS
+# ============================================
+# Cuando una ruta devuelve un modelo, FastAPI lo vuelca a dict, lo vuelve a
+# validar contra `response_model` y lo codifica con json de la stdlib. Los
+# servicios de listado ya construyen el modelo de respuesta (ActivityList,
+# UserList, CategoryList), así que ese segundo paso solo cuesta CPU.
+#
+# ModelResponse serializa el modelo una vez y directamente a bytes con el
+# serializador de pydantic-core (el mismo que define el esquema). FastAPI no
+# toca una Response devuelta por la ruta; `response_model` se mantiene en el
+# decorador para la documentación OpenAPI.
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelResponse(JSONResponse):
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(content)
@@ -0,0 +1,65 @@
+import re
+
+from sqlalchemy import and_, or_, case, literal_column, func
+from sqlalchemy.orm import Session
+
+
+# ============================================
+# BÚSQUEDA DE TEXTO
+# ============================================
+# En PostgreSQL se busca con to_tsvector/to_tsquery sobre una expresión
+# idéntica a la del índice GIN de la migración, para que el planificador
+# pueda usarlo. Los literales van como literal_column (no como parámetros)
+# para que la expresión coincida exactamente con la indexada.
+#
+# En otros motores (SQLite en pruebas) se cae a ILIKE por término.
+
+SEARCH_CONFIG = literal_column("'simple'")
+EMPTY = literal_column("''")
+SEPARATOR = literal_column("' '")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_tokens(search: str | None) -> list[str]:
+    """Términos de búsqueda normalizados (sin operadores ni signos)"""
+    return _TOKEN_RE.findall((search or "").lower())
+
+
+def uses_full_text(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _document(columns):
+    document = func.coalesce(columns[0], EMPTY)
+    for column in columns[1:]:
+        document = document.op("||")(SEPARATOR).op("||")(func.coalesce(column, EMPTY))
+    return func.to_tsvector(SEARCH_CONFIG, document)
+
+
+def _ts_query(tokens: list[str]):
+    # Cada término como prefijo: "dep serv" → "dep:* & serv:*"
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{token}:*" for token in tokens))
+
+
+def search_filter(db: Session, columns: list, tokens: list[str]):
+    """Predicado: todas las palabras aparecen (como prefijo) en alguna columna"""
+    if uses_full_text(db):
+        return _document(columns).op("@@")(_ts_query(tokens))
+
+    return and_(*(
+        or_(*(column.icontains(token, autoescape=True) for column in columns))
+        for token in tokens
+    ))
+
+
+def search_rank(db: Session, columns: list, tokens: list[str]):
+    """Relevancia (mayor es mejor) para ordenar resultados"""
+    if uses_full_text(db):
+        return func.ts_rank(_document(columns), _ts_query(tokens))
+
+    # Fallback: cuenta términos presentes en la primera columna (título)
+    rank = literal_column("0")
+    for token in tokens:
+        rank = rank + case((columns[0].icontains(token, autoescape=True), 1), else_=0)
+    return rank
@@ -1,3 +1,10 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -6,27 +13,138 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.util.concurrency import await_only, in_greenlet
 
 from app.config import settings
-from app.database import get_db
-from app.models import User
+from app.database import get_db, run_db, current_user_id_var
+from app.models import User, RoleEnum
 from app.schemas import TokenData
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger("app.security")
+
 
 # ============================================
 # PASSWORD HASHING
 # ============================================
+# bcrypt consume ~250 ms de CPU por llamada. Se ejecuta en un pool propio
+# y acotado (bcrypt libera el GIL, así que los hilos trabajan en paralelo)
+# para que una ráfaga de logins no ocupe los hilos de las peticiones ni el
+# event loop. Si la cola está llena se responde 503 en lugar de encolar
+# sin límite.
+#
+# En modo sync el login espera el hash bloqueando su hilo del threadpool de
+# anyio (40 por defecto): cada hash en curso ocupa también uno de esos
+# hilos. Por eso, al arrancar, el máximo en curso se limita a una fracción
+# del threadpool (bound_password_hashing); el resto queda para los demás
+# endpoints.
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.password_hash_workers + settings.password_hash_queue_size
+)
+
+
+def bound_password_hashing(threadpool_size: int) -> int:
+    """
+    Fija el máximo de hashes en curso (pool + cola) y lo devuelve. En modo
+    sync no pasa de password_hash_threadpool_share del threadpool; en modo
+    async la espera cede el event loop y no ocupa hilos de peticiones.
+    Llamar al arrancar, antes de atender peticiones.
+    """
+    global _hash_slots
+    limit = settings.password_hash_workers + settings.password_hash_queue_size
+    if not settings.async_db:
+        share = int(threadpool_size * settings.password_hash_threadpool_share)
+        limit = min(limit, max(share, settings.password_hash_workers))
+    _hash_slots = threading.BoundedSemaphore(limit)
+    return limit
+
+
+def _run_hashing(fn, *args):
+    """Ejecuta fn en el pool de hashing y espera el resultado"""
+    slots = _hash_slots
+    if not slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, inténtalo de nuevo",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_pool.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+
+    # Dentro de AsyncSession.run_sync (modo async) se cede el event loop
+    # mientras se espera; en modo sync se bloquea solo el hilo del threadpool
+    if in_greenlet():
+        return await_only(asyncio.wrap_future(future))
+    return future.result()
+
 
 def hash_password(password: str) -> str:
     """Hashea una contraseña"""
-    return pwd_context.hash(password)
+    return _run_hashing(pwd_context.hash, password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica contraseña contra su hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+
+def _hash_rounds(hashed_password: str) -> int | None:
+    """Coste de un hash bcrypt ($2b$12$...)"""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Indica si el hash guardado no usa el coste actual.
+
+    Se tolera un round por encima: workers calibrados en máquinas algo
+    distintas no deben re-hashear en cada login alternándose entre sí.
+    """
+    rounds = _hash_rounds(hashed_password)
+    current = pwd_context.handler("bcrypt").default_rounds
+    return rounds is None or rounds < current or rounds > current + 1
+
+
+def calibrate_password_hashing() -> int:
+    """
+    Elige los rounds de bcrypt para que un hash tarde ~bcrypt_target_ms.
+
+    Cada round duplica el coste, así que basta medir un coste bajo y
+    extrapolar. Con bcrypt_rounds fijo en la configuración no se mide.
+    """
+    rounds = settings.bcrypt_rounds
+    if rounds is None:
+        probe_rounds = 8
+        probe = pwd_context.handler("bcrypt").using(rounds=probe_rounds)
+        elapsed = []
+        for _ in range(3):
+            started = time.perf_counter()
+            probe.hash("calibration")
+            elapsed.append(time.perf_counter() - started)
+        probe_ms = max(min(elapsed) * 1000, 0.01)
+        rounds = probe_rounds + round(math.log2(settings.bcrypt_target_ms / probe_ms))
+
+    rounds = max(settings.bcrypt_min_rounds, min(settings.bcrypt_max_rounds, rounds))
+    pwd_context.update(bcrypt__rounds=rounds)
+    return rounds
+
+
+def shutdown_password_hashing() -> None:
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
 
 
 # ============================================
@@ -68,34 +186,72 @@ def decode_token(token: str) -> TokenData | None:
             settings.secret_key, 
             algorithms=[settings.algorithm]
         )
-        print(f"Payload: {payload}")  # Debug
-        
         user_id = payload.get("sub")
         email = payload.get("email")
         role = payload.get("role")
         
-        print(f"user_id: {user_id}, email: {email}, role: {role}")  # Debug
-        
         if user_id is None:
+            logger.debug("token sin 'sub'")
             return None
             
         return TokenData(user_id=int(user_id), email=email, role=role)
         
     except JWTError as e:
-        print(f"JWTError: {e}")  # Debug - ¿Hay error aquí?
+        logger.debug("token rechazado", extra={"fields": {"reason": type(e).__name__}})
         return None
 
 
+# ============================================
+# CACHÉ DEL USUARIO AUTENTICADO
+# ============================================
+# get_current_user se ejecuta en cada petición autenticada; en vez de
+# consultar users cada vez, se guarda una copia inmutable del usuario
+# (no el objeto ORM, que pertenece a una sesión) por (id, token).
+# user.update, user.delete y change_password la invalidan.
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Usuario autenticado, desacoplado de la sesión de base de datos"""
+    id_user: int
+    username: str
+    email: str
+    role: RoleEnum
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_model(cls, user: User) -> "CurrentUser":
+        return cls(
+            id_user=user.id_user,
+            username=user.username,
+            email=user.email,
+            role=RoleEnum(user.role),
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+principal_cache = TTLCache(
+    maxsize=settings.user_cache_size,
+    ttl=settings.user_cache_ttl_seconds
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Descarta de la caché todas las sesiones (tokens) de un usuario"""
+    principal_cache.discard_where(lambda key: key[0] == user_id)
+
+
 # ============================================
 # DEPENDENCIES: Para inyectar en endpoints
 # ============================================
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    
-    print(f"Token recibido: {token[:50]}...")  # Debug
+) -> CurrentUser:
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -104,18 +260,22 @@ def get_current_user(
     )
     
     token_data = decode_token(token)
-    print(f"Token decodificado: {token_data}")  # Debug
     
     if token_data is None:
-        print("Token data es None!")  # Debug
         raise credentials_exception
     
-    user = db.query(User).filter(User.id_user == token_data.user_id).first()
-    print(f"Usuario encontrado: {user}")  # Debug
+    # Enrutado de lecturas (read-your-writes): ver app.database
+    current_user_id_var.set(token_data.user_id)
+    
+    cache_key = (token_data.user_id, token)
+    cached = principal_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # ...resto del código
+    user = await run_db(db, lambda session: session.query(User).filter(User.id_user == token_data.user_id).first())
     
     if user is None:
+        logger.debug("token de usuario inexistente", extra={"fields": {"id_user": token_data.user_id}})
         raise credentials_exception
     
     if not user.is_active:
@@ -124,12 +284,14 @@ def get_current_user(
             detail="Usuario desactivado"
         )
     
-    return user
+    principal = CurrentUser.from_model(user)
+    principal_cache.set(cache_key, principal)
+    return principal
 
 
-def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+async def get_current_admin(
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     Verifica que el usuario sea admin.
     
@@ -0,0 +1,273 @@
+# benchmarks/query_plans.py
+# Siembra un volumen grande de actividades y guarda EXPLAIN ANALYZE de cada
+# combinación de filtros que expone GET /api/activities.
+#
+# Uso (desde backend/, contra PostgreSQL):
+#   python -m benchmarks.query_plans --seed-rows 500000
+#   python -m benchmarks.query_plans --output plans.json
+#   python -m benchmarks.query_plans --baseline plans.json   # detecta regresiones
+#   python -m benchmarks.query_plans --cleanup
+#
+# Las consultas no se reescriben aquí: se ejecuta el servicio real
+# (activity.get_all) y se capturan las sentencias que emite, así el informe
+# refleja exactamente lo que corre en producción.
+
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import event, text
+
+from app.database import SessionLocal, engine
+from app.models import User, Category, Activity
+from app.models.activity import ActivityStateEnum, PriorityEnum
+from app.schemas import ActivitySortEnum
+from app.services import activity as activity_service
+from app.utils.pagination import TotalModeEnum
+
+BENCH_PREFIX = "bench_"
+OPERATORS = 50
+CATEGORIES = 10
+
+
+# ============================================
+# DATOS
+# ============================================
+
+SEED_SQL = text("""
+    INSERT INTO activity (
+        title, description, state, priority, due_date,
+        id_user, id_category, created_by, is_active, created_at, updated_at
+    )
+    SELECT
+        'bench ' || g || ' ' || (ARRAY['deploy', 'revisar', 'servidor', 'informe', 'cliente'])[1 + g % 5],
+        CASE WHEN g % 3 = 0 THEN 'descripcion ' || md5(g::text) END,
+        (ARRAY['pendiente', 'en_progreso', 'bloqueada', 'completada', 'cancelada'])[1 + g % 5]::activitystateenum,
+        (ARRAY['baja', 'media', 'alta', 'urgente'])[1 + (g / 7) % 4]::priorityenum,
+        CASE WHEN g % 10 = 0 THEN NULL ELSE current_date + (g % 365 - 180) END,
+        CASE WHEN g % 7 = 0 THEN NULL ELSE (:operators)[1 + g % cardinality(:operators)] END,
+        CASE WHEN g % 4 = 0 THEN NULL ELSE (:categories)[1 + g % cardinality(:categories)] END,
+        (:creators)[1 + (g * 7) % cardinality(:creators)],
+        g % 20 <> 0,
+        now() - (g % 1000) * interval '1 hour',
+        now()
+    FROM generate_series(1, :rows) AS g
+""")
+
+
+def seed(db, rows: int) -> None:
+    """Crea usuarios/categorías de benchmark y `rows` actividades"""
+    admin = db.query(User).filter(User.username == f"{BENCH_PREFIX}admin").first()
+    if not admin:
+        db.add(User(username=f"{BENCH_PREFIX}admin", email=f"{BENCH_PREFIX}admin@bench.local",
+                    password="!", role="admin"))
+        db.add_all([
+            User(username=f"{BENCH_PREFIX}op{i}", email=f"{BENCH_PREFIX}op{i}@bench.local", password="!")
+            for i in range(OPERATORS)
+        ])
+        db.add_all([Category(name=f"{BENCH_PREFIX}cat{i}") for i in range(CATEGORIES)])
+        db.commit()
+
+    users = bench_users(db)
+    operators = [u.id_user for u in users if u.role.value != "admin"]
+    categories = [c.id_category for c in db.query(Category).filter(Category.name.like(f"{BENCH_PREFIX}%"))]
+
+    print(f"Sembrando {rows} actividades...")
+    db.execute(SEED_SQL, {
+        "rows": rows,
+        "operators": operators,
+        "categories": categories,
+        "creators": operators + [users[0].id_user],
+    })
+    db.commit()
+
+    # Estadísticas frescas: sin ANALYZE los planes no son representativos
+    db.execute(text("ANALYZE activity"))
+    db.commit()
+
+
+def cleanup(db) -> None:
+    ids = [u.id_user for u in bench_users(db)]
+    if ids:
+        db.query(Activity).filter(Activity.created_by.in_(ids)).delete(synchronize_session=False)
+        db.query(Activity).filter(Activity.id_user.in_(ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.id_user.in_(ids)).delete(synchronize_session=False)
+    db.query(Category).filter(Category.name.like(f"{BENCH_PREFIX}%")).delete(synchronize_session=False)
+    db.commit()
+    print("Datos de benchmark eliminados")
+
+
+def bench_users(db) -> list[User]:
+    """Admin primero, luego operadores"""
+    return (
+        db.query(User)
+        .filter(User.username.like(f"{BENCH_PREFIX}%"))
+        .order_by(User.role, User.id_user)
+        .all()
+    )
+
+
+# ============================================
+# ESCENARIOS
+# ============================================
+
+def scenarios(db) -> list[tuple[str, User, dict]]:
+    """Cada combinación de filtros del router, como admin y como operador"""
+    users = bench_users(db)
+    if not users:
+        sys.exit("No hay datos de benchmark: ejecuta primero con --seed-rows N")
+
+    admin, operator = users[0], users[1]
+    category = db.query(Category).filter(Category.name == f"{BENCH_PREFIX}cat0").first()
+    today = date.today()
+
+    deep = activity_service.get_all(db, admin, skip=9_999, limit=1, total_mode=TotalModeEnum.none)
+
+    return [
+        ("admin: sin filtros", admin, {}),
+        ("admin: state", admin, {"state": ActivityStateEnum.pendiente}),
+        ("admin: priority", admin, {"priority": PriorityEnum.urgente}),
+        ("admin: id_category", admin, {"id_category": category.id_category}),
+        ("admin: id_user", admin, {"id_user": operator.id_user}),
+        ("admin: rango de fechas", admin, {"due_date_from": today, "due_date_to": today + timedelta(days=7)}),
+        ("admin: state + id_category", admin, {"state": ActivityStateEnum.en_progreso, "id_category": category.id_category}),
+        ("admin: búsqueda", admin, {"search": "deploy"}),
+        ("admin: búsqueda por relevancia", admin, {"search": "deploy", "sort": ActivitySortEnum.relevance}),
+        ("admin: incluye inactivas", admin, {"include_inactive": True}),
+        ("admin: offset profundo", admin, {"skip": 10_000}),
+        ("admin: cursor profundo", admin, {"cursor": deep.next_cursor}),
+        ("admin: total estimado", admin, {"total_mode": TotalModeEnum.estimated}),
+        ("admin: sin total", admin, {"total_mode": TotalModeEnum.none}),
+        ("operador: sin filtros", operator, {}),
+        ("operador: state", operator, {"state": ActivityStateEnum.pendiente}),
+        ("operador: búsqueda", operator, {"search": "servidor"}),
+        ("operador: sin total", operator, {"total_mode": TotalModeEnum.none}),
+    ]
+
+
+# ============================================
+# EXPLAIN ANALYZE
+# ============================================
+
+def capture_statements(db, current_user: User, filters: dict) -> list[tuple[str, dict]]:
+    """Ejecuta el servicio real y devuelve las sentencias que emitió"""
+    captured = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        activity_service.get_all(db, current_user, **filters)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    return [(s, p) for s, p in captured if not s.lstrip().upper().startswith("EXPLAIN")]
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(db, statement: str, parameters) -> dict:
+    raw = db.connection().exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+    ).scalar()
+    root = raw[0]
+    nodes = list(_walk(root["Plan"]))
+    return {
+        "statement": statement,
+        "execution_ms": root["Execution Time"],
+        "planning_ms": root["Planning Time"],
+        "indexes": sorted({n["Index Name"] for n in nodes if "Index Name" in n}),
+        "index_conds": [n["Index Cond"] for n in nodes if "Index Cond" in n],
+        "seq_scans": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}),
+        "shared_hit": root["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read": root["Plan"].get("Shared Read Blocks", 0),
+        "plan": root["Plan"],
+    }
+
+
+def run(db) -> dict:
+    report = {}
+    for name, current_user, filters in scenarios(db):
+        statements = capture_statements(db, current_user, filters)
+        report[name] = [explain(db, statement, parameters) for statement, parameters in statements]
+        db.rollback()
+
+        total_ms = sum(p["execution_ms"] for p in report[name])
+        indexes = ", ".join(i for p in report[name] for i in p["indexes"]) or "-"
+        seq = ", ".join(s for p in report[name] for s in p["seq_scans"])
+        # Con cursor, el límite inferior del keyset debe llegar al índice
+        # como Index Cond; si solo es Filter, el recorrido empieza al principio
+        no_seek = "cursor" in filters and not any(p["index_conds"] for p in report[name])
+        print(f"{name:<34} {len(statements)} sent. {total_ms:9.2f} ms  idx: {indexes}"
+              + (f"  SEQ SCAN: {seq}" if seq else "")
+              + ("  SIN INDEX COND" if no_seek else ""))
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regresiones: más lento que baseline * tolerance, seq scans nuevos o cursor sin Index Cond"""
+    regressions = []
+    for name, plans in report.items():
+        if name not in baseline:
+            continue
+        before = sum(p["execution_ms"] for p in baseline[name])
+        after = sum(p["execution_ms"] for p in plans)
+        if before and after > before * tolerance:
+            regressions.append(f"{name}: {before:.2f} ms → {after:.2f} ms")
+
+        seq_before = {s for p in baseline[name] for s in p["seq_scans"]}
+        seq_after = {s for p in plans for s in p["seq_scans"]}
+        if seq_after - seq_before:
+            regressions.append(f"{name}: nuevo seq scan en {', '.join(sorted(seq_after - seq_before))}")
+
+        if any(p.get("index_conds") for p in baseline[name]) and not any(p["index_conds"] for p in plans):
+            regressions.append(f"{name}: el índice ya no recibe Index Cond")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE del listado de actividades")
+    parser.add_argument("--seed-rows", type=int, default=0, help="actividades a sembrar antes de medir")
+    parser.add_argument("--cleanup", action="store_true", help="borra los datos de benchmark y sale")
+    parser.add_argument("--output", help="guarda el informe completo (JSON)")
+    parser.add_argument("--baseline", help="informe previo con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="factor de lentitud tolerado")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("EXPLAIN ANALYZE requiere PostgreSQL (DATABASE_URL)")
+
+    db = SessionLocal()
+    try:
+        if args.cleanup:
+            cleanup(db)
+            return
+        if args.seed_rows:
+            seed(db, args.seed_rows)
+
+        report = run(db)
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, default=str)
+            print(f"Informe guardado en {args.output}")
+
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                regressions = compare(report, json.load(f), args.tolerance)
+            for line in regressions:
+                print(f"REGRESIÓN {line}")
+            if regressions:
+                sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/read_path.py
+# Compara el listado de actividades hidratando instancias ORM (como se
+# hacía antes) con la lectura por columnas de activity.get_all (filas Row):
+# tiempo y memoria asignada por página, hasta construir ActivityList.
+#
+# Uso (desde backend/, con actividades en la base de datos):
+#   python -m benchmarks.read_path
+#   python -m benchmarks.read_path --limit 100 --rounds 500
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app.database import SessionLocal
+from app.models import User, Activity
+from app.schemas import ActivityList
+from app.services import activity as activity_service
+from app.utils.pagination import TotalModeEnum
+
+
+def orm_page(db, current_user: User, limit: int) -> ActivityList:
+    """Mismo orden y filtros que get_all para admin, cargando entidades"""
+    activities = (
+        db.query(Activity)
+        .filter(Activity.is_active == True)
+        .order_by(*activity_service._order_by())
+        .limit(limit)
+        .all()
+    )
+    return ActivityList(activities=activities, total=None, page=1, per_page=limit)
+
+
+def row_page(db, current_user: User, limit: int) -> ActivityList:
+    return activity_service.get_all(db, current_user, limit=limit, total_mode=TotalModeEnum.none)
+
+
+def measure(fn, admin: User, limit: int, rounds: int) -> tuple[list[float], list[int]]:
+    """
+    Cada ronda en una sesión nueva, como una petición. El tiempo y la
+    memoria se miden en pasadas separadas: tracemalloc ralentiza mucho.
+    """
+    timings, peaks = [], []
+    for _ in range(rounds):
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            fn(db, admin, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+    for _ in range(max(rounds // 10, 1)):
+        with SessionLocal() as db:
+            tracemalloc.start()
+            fn(db, admin, limit)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return timings, peaks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Listado de actividades: ORM frente a filas")
+    parser.add_argument("--limit", type=int, default=100, help="actividades por página")
+    parser.add_argument("--rounds", type=int, default=200, help="repeticiones por camino")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        admin = db.query(User).filter(User.role == "admin", User.is_active == True).first()
+        if admin is None:
+            sys.exit("No hay ningún admin activo en la base de datos")
+        db.expunge(admin)
+        if [a.id_activity for a in orm_page(db, admin, args.limit).activities] != \
+                [a.id_activity for a in row_page(db, admin, args.limit).activities]:
+            sys.exit("Los dos caminos devuelven actividades distintas")
+
+    print(f"GET /api/activities?limit={args.limit} (admin), {args.rounds} repeticiones")
+    results = {}
+    for name, fn in (("ORM", orm_page), ("filas Row", row_page)):
+        with SessionLocal() as db:
+            fn(db, admin, args.limit)  # calentamiento
+        timings, peaks = measure(fn, admin, args.limit, args.rounds)
+        results[name] = statistics.median(timings), statistics.median(peaks)
+        print(f"{name:<10} mediana {results[name][0]:7.3f} ms  pico de memoria {results[name][1] / 1024:8.1f} KiB")
+
+    print(f"tiempo x{results['ORM'][0] / results['filas Row'][0]:.1f}, "
+          f"memoria x{results['ORM'][1] / results['filas Row'][1]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/serialization.py
+# Compara la serialización de GET /api/activities?limit=100 por el camino
+# por defecto de FastAPI (volcado a dict, revalidación contra
+# response_model, jsonable_encoder y json de la stdlib) con ModelResponse
+# (un único volcado a bytes con pydantic-core).
+#
+# Uso (desde backend/):
+#   python -m benchmarks.serialization                  # página sintética, sin base de datos
+#   python -m benchmarks.serialization --from-db        # página real de activity.get_all (primer admin)
+#   python -m benchmarks.serialization --rounds 2000 --limit 100
+#
+# Ambos caminos parten del mismo ActivityList ya construido por el
+# servicio; se comprueba además que producen el mismo JSON.
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import User, Activity
+from app.models.activity import ActivityStateEnum, PriorityEnum
+from app.schemas import ActivityList
+from app.services import activity as activity_service
+from app.utils.pagination import TotalModeEnum
+from app.utils.responses import ModelResponse
+
+
+# ============================================
+# PÁGINA DE PRUEBA
+# ============================================
+
+def synthetic_page(limit: int) -> ActivityList:
+    """Página construida como la construye el servicio: desde instancias ORM"""
+    now = datetime.now()
+    states, priorities = list(ActivityStateEnum), list(PriorityEnum)
+    activities = [
+        Activity(
+            id_activity=i,
+            title=f"Actividad {i} revisar servidor",
+            description="descripción de prueba " * 4 if i % 3 else None,
+            state=states[i % len(states)],
+            priority=priorities[i % len(priorities)],
+            due_date=date.today() + timedelta(days=i % 30) if i % 10 else None,
+            id_user=i % 7 or None,
+            id_category=i % 4 or None,
+            created_by=1 + i % 5,
+            is_active=True,
+            version=1 + i % 3,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(1, limit + 1)
+    ]
+    return ActivityList(activities=activities, total=10_000, page=1, per_page=limit, next_cursor="eyJ4IjoxfQ")
+
+
+def db_page(limit: int) -> ActivityList:
+    with SessionLocal() as db:
+        admin = db.query(User).filter(User.role == "admin", User.is_active == True).first()
+        if admin is None:
+            sys.exit("No hay ningún admin activo en la base de datos")
+        page = activity_service.get_all(db, admin, limit=limit, total_mode=TotalModeEnum.none)
+    if len(page.activities) < limit:
+        print(f"Aviso: la página solo tiene {len(page.activities)} actividades")
+    return page
+
+
+# ============================================
+# CAMINOS DE SERIALIZACIÓN
+# ============================================
+
+def _list_route() -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == "/api/activities" and "GET" in route.methods:
+            return route
+    raise RuntimeError("No se encontró GET /api/activities")
+
+
+async def fastapi_default(route: APIRoute, page: ActivityList) -> bytes:
+    content = await serialize_response(field=route.response_field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def model_response(route: APIRoute, page: ActivityList) -> bytes:
+    return ModelResponse(page).body
+
+
+def measure(fn, route: APIRoute, page: ActivityList, rounds: int) -> list[float]:
+    async def run() -> list[float]:
+        for _ in range(min(rounds, 50)):
+            await fn(route, page)
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await fn(route, page)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialización del listado de actividades")
+    parser.add_argument("--limit", type=int, default=100, help="actividades por página")
+    parser.add_argument("--rounds", type=int, default=1000, help="repeticiones por camino")
+    parser.add_argument("--from-db", action="store_true", help="usa una página real de la base de datos")
+    args = parser.parse_args()
+
+    page = db_page(args.limit) if args.from_db else synthetic_page(args.limit)
+    route = _list_route()
+
+    default_body = asyncio.run(fastapi_default(route, page))
+    fast_body = asyncio.run(model_response(route, page))
+    if json.loads(default_body) != json.loads(fast_body):
+        sys.exit("Los dos caminos producen JSON distinto")
+
+    print(f"GET /api/activities?limit={args.limit}: {len(page.activities)} filas, "
+          f"{len(fast_body)} bytes, {args.rounds} repeticiones")
+    results = {}
+    for name, fn in (("fastapi por defecto", fastapi_default), ("ModelResponse", model_response)):
+        timings = measure(fn, route, page, args.rounds)
+        results[name] = statistics.median(timings)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(f"{name:<20} mediana {results[name]:7.3f} ms  p95 {p95:7.3f} ms")
+
+    print(f"mejora x{results['fastapi por defecto'] / results['ModelResponse']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
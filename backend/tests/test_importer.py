@@ -0,0 +1,78 @@
+# tests/test_importer.py
+# Importación CSV: un lote rechazado por la base de datos se deshace y se
+# informa por fila, también cuando el error llega del DBAPI (COPY).
+#
+# Uso (desde backend/):
+#   python -m unittest tests.test_importer
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/importer.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-" + "x" * 16)
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from app.config import settings
+from app.database import Base, SessionLocal, engine
+from app.models import User, Activity, Historical
+from app.services import importer
+
+
+class FailingCopy(importer._Importer):
+    """Fuerza el camino COPY; el segundo lote falla con un error del DBAPI"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.copy = True
+        self.batches = 0
+
+    def _copy(self, rows: list[dict]) -> list[int]:
+        self.batches += 1
+        if self.batches == 2:
+            raise self.dbapi_error("COPY rechazado")
+        return self._executemany(rows)
+
+
+class ImportFailingBatchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            user = User(username="importer", email="importer@test.local", password="!", role="admin")
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            db.expunge(user)
+        cls.user = user
+
+    @classmethod
+    def tearDownClass(cls):
+        engine.dispose()
+        _tmp.cleanup()
+
+    def test_failing_copy_batch_is_rolled_back_and_reported(self):
+        csv_data = "title\n" + "".join(f"Actividad importada {i}\n" for i in range(5))
+
+        with mock.patch.object(importer, "_Importer", FailingCopy), \
+                mock.patch.object(settings, "import_batch_size", 2):
+            result = importer.import_csv(io.BytesIO(csv_data.encode()), self.user)
+
+        # Lotes de líneas 2-3, 4-5 (rechazado) y 6
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.failed, 2)
+        self.assertEqual([e.line for e in result.errors], [4, 5])
+        self.assertTrue(all("Error" in e.error for e in result.errors))
+
+        with SessionLocal() as db:
+            titles = {a.title for a in db.query(Activity).filter(Activity.created_by == self.user.id_user)}
+            audited = db.query(Historical).filter(Historical.entity == "activity").count()
+        self.assertEqual(titles, {"Actividad importada 0", "Actividad importada 1", "Actividad importada 4"})
+        self.assertEqual(audited, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()